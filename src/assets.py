@@ -0,0 +1,108 @@
+import os, shutil
+from concurrent.futures import ThreadPoolExecutor
+from manifest import hash_file
+from discovery import is_ignored
+
+
+def list_files(src):
+    """Returns {relative path: os.stat_result} for every file under `src` that isn't ignored."""
+    files = {}
+    stack = [""]
+
+    while stack:
+        rel_dir = stack.pop()
+        with os.scandir(os.path.join(src, rel_dir)) as entries:
+            for entry in entries:
+                if is_ignored(entry.name):
+                    continue
+                rel_path = os.path.join(rel_dir, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(rel_path)
+                elif entry.is_file():
+                    files[rel_path] = entry.stat()
+
+    return files
+
+
+def is_up_to_date(src_path, src_stat, dest_path, use_hash=False) -> bool:
+    try:
+        dest_stat = os.stat(dest_path)
+    except OSError:
+        return False
+
+    if dest_stat.st_size != src_stat.st_size:
+        return False
+    if dest_stat.st_mtime_ns == src_stat.st_mtime_ns:
+        return True
+    return use_hash and hash_file(src_path) == hash_file(dest_path)
+
+
+def fingerprint_name(rel_path, digest, length=8) -> str:
+    """Inserts a content digest before the extension: images/logo.svg -> images/logo.1a2b3c4d.svg."""
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{digest[:length]}{ext}"
+
+
+def copy_asset(src_path, dest_path, hardlink=False):
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+
+    if hardlink:
+        try:
+            if os.path.lexists(dest_path):
+                os.remove(dest_path)
+            os.link(src_path, dest_path)
+            return
+        except OSError:
+            # Different filesystem or no link support; fall back to a copy.
+            pass
+
+    # copy2 uses sendfile/copy_file_range where the platform supports them and
+    # keeps the mtime, which is what the next sync compares against.
+    shutil.copy2(src_path, dest_path)
+
+
+def sync_static(src, dest, previous=(), use_hash=False, hardlink=False, jobs=1, rename=None):
+    """Mirrors `src` into `dest`, touching only what changed.
+
+    Args:
+        src (str): static asset directory
+        dest (str): output directory, which may also hold generated pages
+        previous (iterable(str)): relative output paths written by the last
+            build; any of them not written this time are deleted from `dest`
+        use_hash (bool): compare content hashes when size matches but mtime doesn't
+        hardlink (bool): hardlink assets into `dest` instead of copying them
+        jobs (int): number of copy threads
+        rename (callable): rename(rel_path, stat) gives the relative output path
+            of a file, e.g. a fingerprinted name; by default it is unchanged
+
+    Returns:
+        tuple(lst([str]), lst([str]), lst([str])): all synced relative paths,
+        the ones copied this time and the output paths removed.
+    """
+    files = list_files(src)
+    outputs = {rel_path: rename(rel_path, stat) if rename else rel_path for rel_path, stat in files.items()}
+
+    changed = []
+    for rel_path, stat in files.items():
+        if not is_up_to_date(os.path.join(src, rel_path), stat, os.path.join(dest, outputs[rel_path]), use_hash):
+            changed.append(rel_path)
+    changed.sort()
+
+    def copy(rel_path):
+        copy_asset(os.path.join(src, rel_path), os.path.join(dest, outputs[rel_path]), hardlink)
+
+    if jobs <= 1 or len(changed) <= 1:
+        for rel_path in changed:
+            copy(rel_path)
+    else:
+        with ThreadPoolExecutor(max_workers=min(jobs, len(changed))) as executor:
+            list(executor.map(copy, changed))
+
+    removed = sorted(set(previous) - set(outputs.values()))
+    for rel_path in removed:
+        try:
+            os.remove(os.path.join(dest, rel_path))
+        except FileNotFoundError:
+            pass
+
+    return sorted(files), changed, removed
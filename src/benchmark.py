@@ -0,0 +1,168 @@
+import argparse, io, os, random, shutil, tempfile, time
+from mod_markdown import markdown_to_blocks, classify_block, text_to_textnodes, markdown_to_html_node
+from main import discover_pages, generate_page
+
+WORDS = ("elf", "ring", "shire", "hobbit", "wizard", "mountain", "river", "forest",
+         "sword", "king", "road", "tower", "star", "stone", "song", "journey")
+
+# name: (number of pages, blocks per page, directory depth, kind of block to favour)
+CORPORA = {
+    "small": (2000, 8, 1, None),
+    "huge": (3, 20000, 1, None),
+    "links": (500, 40, 1, "links"),
+    "lists": (200, 30, 1, "lists"),
+    "deep": (1000, 8, 12, None),
+}
+
+
+def _words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def _inline(rng, favour=None):
+    parts = []
+    for _ in range(rng.randint(3, 8)):
+        roll = rng.random()
+        if favour == "links" and roll < 0.5 or roll < 0.1:
+            parts.append(f"[{_words(rng, 2)}](/{rng.choice(WORDS)}/{rng.randint(1, 999)})")
+        elif roll < 0.2:
+            parts.append(f"**{_words(rng, 2)}**")
+        elif roll < 0.3:
+            parts.append(f"*{_words(rng, 1)}*")
+        elif roll < 0.35:
+            parts.append(f"`{rng.choice(WORDS)}()`")
+        elif roll < 0.38:
+            parts.append(f"![{_words(rng, 2)}](/images/{rng.choice(WORDS)}.png)")
+        else:
+            parts.append(_words(rng, rng.randint(3, 12)))
+    return " ".join(parts)
+
+
+def _block(rng, favour=None):
+    roll = rng.random()
+    if favour == "lists" and roll < 0.7 or roll < 0.15:
+        items = rng.randint(5, 60 if favour == "lists" else 8)
+        if rng.random() < 0.5:
+            return "\n".join(f"* {_inline(rng, favour)}" for _ in range(items))
+        return "\n".join(f"{number}. {_inline(rng, favour)}" for number in range(1, items + 1))
+    elif roll < 0.25:
+        return f"{'#' * rng.randint(2, 6)} {_words(rng, 4)}"
+    elif roll < 0.3:
+        return f"> {_inline(rng, favour)}"
+    elif roll < 0.35:
+        return "```\n" + "\n".join(_words(rng, 6) for _ in range(rng.randint(2, 10))) + "\n```"
+    return _inline(rng, favour)
+
+
+def generate_markdown(rng, blocks, favour=None):
+    parts = [f"# {_words(rng, 3).title()}"]
+    parts.extend(_block(rng, favour) for _ in range(blocks - 1))
+    return "\n\n".join(parts) + "\n"
+
+
+def generate_corpus(root, name, seed=0, scale=1.0):
+    """Writes a reproducible corpus of markdown pages under `root` and returns their paths."""
+    pages, blocks, depth, favour = CORPORA[name]
+    rng = random.Random(f"{name}:{seed}")
+    paths = []
+
+    # Corpora of a few huge pages scale by page length, the rest by page count.
+    if pages < 10:
+        blocks = max(2, int(blocks * scale))
+    else:
+        pages = max(1, int(pages * scale))
+
+    for index in range(pages):
+        parts = [f"d{(index >> level) % 4}" for level in range(depth - 1)]
+        directory = os.path.join(root, *parts)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"page{index}.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(generate_markdown(rng, blocks, favour))
+        paths.append(path)
+
+    return paths
+
+
+def _timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def benchmark_corpus(root, template_path):
+    """Times each stage over every page in `root` and returns {stage: (seconds, amount, unit)}."""
+    markdowns = []
+    for from_path, _ in discover_pages(root, root):
+        with open(from_path, "r", encoding="utf-8") as f:
+            markdowns.append(f.read())
+
+    blocks, parse_time = _timed(lambda: [markdown_to_blocks(markdown) for markdown in markdowns])
+    all_blocks = [block for page in blocks for block in page]
+
+    classified, classify_time = _timed(lambda: [classify_block(block) for block in all_blocks])
+    inline_texts = [text for _, items, _ in classified for text in items]
+
+    inline_nodes, inline_time = _timed(lambda: sum(len(text_to_textnodes(text)) for text in inline_texts))
+
+    trees = [markdown_to_html_node(markdown) for markdown in markdowns]
+
+    def serialise():
+        written = 0
+        for tree in trees:
+            stream = io.StringIO()
+            tree.write_html(stream)
+            written += len(stream.getvalue())
+        return written
+    html_chars, serialise_time = _timed(serialise)
+
+    output = tempfile.mkdtemp(prefix="ssg-bench-")
+    try:
+        pages = discover_pages(root, output)
+
+        def write_pages():
+            for from_path, dest_path in pages:
+                generate_page(from_path, template_path, dest_path)
+            return sum(os.path.getsize(dest_path) for _, dest_path in pages)
+        written_bytes, io_time = _timed(write_pages)
+    finally:
+        shutil.rmtree(output)
+
+    return {
+        "parse": (parse_time, len(all_blocks), "blocks"),
+        "classify": (classify_time, len(all_blocks), "blocks"),
+        "inline": (inline_time, inline_nodes, "inline nodes"),
+        "serialise": (serialise_time, html_chars / 1e6, "MB"),
+        "io": (io_time, written_bytes / 1e6, "MB"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the markdown pipeline on synthetic corpora")
+    parser.add_argument("corpora", nargs="*", metavar="CORPUS",
+                        help=f"corpora to run: {', '.join(sorted(CORPORA))} (default: all)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply the size of each corpus by this")
+    parser.add_argument("--template", default="./template.html")
+    args = parser.parse_args()
+
+    unknown = set(args.corpora) - CORPORA.keys()
+    if unknown:
+        parser.error(f"unknown corpus: {', '.join(sorted(unknown))}")
+
+    for name in args.corpora or sorted(CORPORA):
+        root = tempfile.mkdtemp(prefix=f"ssg-corpus-{name}-")
+        try:
+            generate_corpus(root, name, args.seed, args.scale)
+            results = benchmark_corpus(root, args.template)
+        finally:
+            shutil.rmtree(root)
+
+        print(f"{name}:")
+        for stage, (seconds, amount, unit) in results.items():
+            rate = amount / seconds if seconds else float("inf")
+            print(f"  {stage:<10} {seconds * 1000:9.1f} ms  {rate:14,.1f} {unit}/s")
+
+
+if __name__ == '__main__':
+    main()
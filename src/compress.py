@@ -0,0 +1,132 @@
+import gzip, os
+from concurrent.futures import ThreadPoolExecutor
+from assets import list_files
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from compression import zstd
+except ImportError:
+    try:
+        import zstandard as zstd
+    except ImportError:
+        zstd = None
+
+# Every encoding a sibling may have been written in, whether or not it is available now.
+SIBLING_ENCODINGS = ("gz", "br", "zst")
+COMPRESSIBLE_SUFFIXES = {".html", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt", ".map"}
+MIN_SIZE = 256
+
+
+def _compress_zstd(data):
+    if hasattr(zstd, "ZstdCompressor"):
+        return zstd.ZstdCompressor(level=19).compress(data)
+    return zstd.compress(data, 19)
+
+
+COMPRESSORS = {"gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+if brotli is not None:
+    COMPRESSORS["br"] = lambda data: brotli.compress(data, quality=11)
+if zstd is not None:
+    COMPRESSORS["zst"] = _compress_zstd
+
+
+def available_encodings() -> list:
+    """Encodings this interpreter can produce: gzip always, brotli and zstd when installed."""
+    return list(COMPRESSORS)
+
+
+def compress_file(path, encodings) -> list:
+    """Writes `path.<encoding>` siblings that are missing or older than `path`.
+
+    Each sibling gets the source's mtime, so an unchanged file is skipped next
+    time without reading it. Returns the encodings written.
+    """
+    source_mtime_ns = os.stat(path).st_mtime_ns
+    stale = []
+    for encoding in encodings:
+        try:
+            if os.stat(f"{path}.{encoding}").st_mtime_ns == source_mtime_ns:
+                continue
+        except FileNotFoundError:
+            pass
+        stale.append(encoding)
+
+    if not stale:
+        return []
+
+    with open(path, "rb") as f:
+        data = f.read()
+
+    for encoding in stale:
+        sibling = f"{path}.{encoding}"
+        tmp_path = f"{sibling}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(COMPRESSORS[encoding](data))
+        os.utime(tmp_path, ns=(source_mtime_ns, source_mtime_ns))
+        os.replace(tmp_path, sibling)
+
+    return stale
+
+
+def remove_siblings(paths) -> int:
+    """Deletes the compressed siblings of `paths`, e.g. after they were rewritten
+    by a build that didn't precompress. Returns the number removed.
+
+    As in precompress_tree, only siblings of compressible files are ours.
+    """
+    removed = 0
+    for path in paths:
+        if os.path.splitext(path)[1].lower() not in COMPRESSIBLE_SUFFIXES:
+            continue
+        for encoding in SIBLING_ENCODINGS:
+            try:
+                os.remove(f"{path}.{encoding}")
+            except FileNotFoundError:
+                continue
+            removed += 1
+    return removed
+
+
+def precompress_tree(root, encodings=None, jobs=1):
+    """Precompresses every compressible file under `root` and drops orphaned siblings.
+
+    A sibling is orphaned when its file is gone or no longer compressible, or
+    when its encoding is not one of `encodings`: it would not be kept up to date.
+
+    Returns:
+        tuple(int, int): the number of siblings written and removed.
+    """
+    encodings = encodings or available_encodings()
+    suffixes = tuple(f".{encoding}" for encoding in SIBLING_ENCODINGS)
+    files = list_files(root)
+
+    def compressible(rel_path):
+        return (os.path.splitext(rel_path)[1].lower() in COMPRESSIBLE_SUFFIXES
+                and rel_path in files and files[rel_path].st_size >= MIN_SIZE)
+
+    sources, orphans = [], []
+    for rel_path in files:
+        if rel_path.endswith(suffixes):
+            # Only siblings of compressible files are ours; an archive like data.tar.gz is left alone.
+            base, encoding = rel_path.rsplit(".", 1)
+            if (os.path.splitext(base)[1].lower() in COMPRESSIBLE_SUFFIXES
+                    and (not compressible(base) or encoding not in encodings)):
+                orphans.append(rel_path)
+        elif compressible(rel_path):
+            sources.append(os.path.join(root, rel_path))
+
+    for rel_path in orphans:
+        os.remove(os.path.join(root, rel_path))
+
+    # zlib and brotli release the GIL while compressing, so threads scale here.
+    if jobs <= 1 or len(sources) <= 1:
+        written = [compress_file(path, encodings) for path in sorted(sources)]
+    else:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            written = list(executor.map(lambda path: compress_file(path, encodings), sorted(sources)))
+
+    return sum(len(encodings_written) for encodings_written in written), len(orphans)
@@ -0,0 +1,54 @@
+import copy, os
+
+
+class BuildConfig:
+    """Where a build reads its sources and writes its output, and how pages are rendered.
+
+    Passed explicitly to the build steps rather than read from module globals,
+    so a shard build (see with_output) or a test can point them elsewhere.
+    `layouts` and `slots` are dicts; see parse_args in main.py for the options.
+    """
+
+    def __init__(self, content="./content", static="./static", public="./public", template="./template.html",
+                 cache="./.cache", jobs=1, layouts=None, slots=None, minify=False, stream_threshold=None,
+                 block_cache_size=0, parse_cache_size=0, async_io=False, max_in_flight=None, memory_sites=0):
+        self.content = content
+        self.static = static
+        self.public = public
+        self.template = template
+        self.manifest = os.path.join(cache, "manifest.json")
+        self.parse_cache = os.path.join(cache, "parse")
+        self.search_store = os.path.join(cache, "search")
+        self.tree_index = os.path.join(cache, "tree.json")
+        self.jobs = jobs
+        self.layouts = layouts or {}
+        self.slots = slots or {}
+        self.minify = minify
+        self.stream_threshold = stream_threshold
+        self.block_cache_size = block_cache_size
+        self.parse_cache_size = parse_cache_size
+        self.async_io = async_io
+        self.max_in_flight = max_in_flight
+        self.memory_sites = memory_sites
+
+    @classmethod
+    def from_args(cls, args):
+        """Builds the config of the default site layout from parsed command-line arguments.
+
+        Low-memory builds stream every page and keep at most two pages per worker
+        submitted but not yet recorded, so a slow page doesn't leave workers idle.
+        """
+        stream_threshold, max_in_flight = args.stream_threshold, None
+        if args.low_memory:
+            stream_threshold, max_in_flight = 0, 2 * max(1, args.jobs or os.cpu_count() or 1)
+        return cls(jobs=args.jobs, layouts=dict(args.layout), slots=dict(args.slot), minify=args.minify,
+                   stream_threshold=stream_threshold, block_cache_size=args.block_cache_size,
+                   parse_cache_size=args.parse_cache_size, async_io=args.async_io, max_in_flight=max_in_flight,
+                   memory_sites=args.memory_report or 0)
+
+    def with_output(self, directory):
+        """Returns a copy that writes its pages to directory/public and its manifest to directory/manifest.json."""
+        config = copy.copy(self)
+        config.public = os.path.join(directory, "public")
+        config.manifest = os.path.join(directory, "manifest.json")
+        return config
@@ -0,0 +1,104 @@
+import fnmatch, json, os, time
+
+TREE_INDEX_VERSION = 1
+# Dotfiles (.DS_Store, editor swap files, .git) and the ":Zone.Identifier"
+# streams Windows leaves next to downloaded files when copied through WSL.
+IGNORE_PATTERNS = (".*", "*:Zone.Identifier")
+# A directory modified this recently may change again within the same mtime
+# tick, so its listing is not trusted on the next build.
+RACY_WINDOW_NS = 2 * 10 ** 9
+
+
+def is_ignored(name, patterns=IGNORE_PATTERNS) -> bool:
+    return any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+
+
+def _sort_key(rel_path):
+    # Orders paths like a depth-first walk over sorted directory listings.
+    return rel_path.split(os.sep)
+
+
+class TreeIndex:
+    """Persisted directory listings, reused while a directory's mtime is unchanged.
+
+    Adding, removing or renaming an entry updates its directory's mtime, so an
+    unchanged directory costs one stat instead of a listing. `dirs` maps each
+    directory path to {"mtime_ns", "files", "dirs"} with ignored names left out.
+    """
+
+    def __init__(self, path=None, dirs=None, patterns=IGNORE_PATTERNS):
+        self.path = path
+        self.dirs = dirs if dirs is not None else {}
+        self.patterns = patterns
+        self.listed = 0
+
+    @classmethod
+    def load(cls, path, patterns=IGNORE_PATTERNS):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path, patterns=patterns)
+
+        if data.get("version") != TREE_INDEX_VERSION or data.get("patterns") != list(patterns):
+            return cls(path, patterns=patterns)
+        return cls(path, data.get("dirs", {}), patterns)
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": TREE_INDEX_VERSION, "patterns": list(self.patterns), "dirs": self.dirs}, f,
+                      separators=(",", ":"), sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def _list(self, path):
+        mtime_ns = os.stat(path).st_mtime_ns
+        entry = self.dirs.get(path)
+        if entry is not None and entry["mtime_ns"] == mtime_ns:
+            return entry
+
+        files, dirs = [], []
+        with os.scandir(path) as entries:
+            for dir_entry in entries:
+                if is_ignored(dir_entry.name, self.patterns):
+                    continue
+                if dir_entry.is_file():
+                    files.append(dir_entry.name)
+                elif dir_entry.is_dir():
+                    dirs.append(dir_entry.name)
+        self.listed += 1
+
+        entry = {"mtime_ns": mtime_ns, "files": sorted(files), "dirs": sorted(dirs)}
+        if time.time_ns() - mtime_ns >= RACY_WINDOW_NS:
+            self.dirs[path] = entry
+        else:
+            self.dirs.pop(path, None)
+        return entry
+
+    def files(self, root) -> list:
+        """Returns the relative path of every file under `root`, in depth-first order.
+
+        Listings of directories that no longer exist under `root` are dropped.
+        """
+        rel_paths = []
+        seen = set()
+        stack = [""]
+
+        while stack:
+            rel_dir = stack.pop()
+            path = os.path.join(root, rel_dir) if rel_dir else root
+            seen.add(path)
+            entry = self._list(path)
+            rel_paths.extend(os.path.join(rel_dir, name) for name in entry["files"])
+            stack.extend(os.path.join(rel_dir, name) for name in entry["dirs"])
+
+        prefix = os.path.join(root, "")
+        for path in [path for path in self.dirs if path.startswith(prefix) and path not in seen]:
+            del self.dirs[path]
+
+        rel_paths.sort(key=_sort_key)
+        return rel_paths
@@ -1,21 +1,90 @@
+import io, re
+
+# Attribute values that are safe to write without quotes (HTML "unquoted attribute value" syntax).
+UNQUOTED_VALUE_PATTERN = re.compile(r"[^\s\"'=<>`]+")
+# Elements whose contents are whitespace-sensitive and are never minified.
+PRESERVED_ELEMENT_PATTERN = re.compile(r"<(pre|code|textarea|script|style)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+TAG_NAME_PATTERN = re.compile(r"</?([A-Za-z][\w-]*)")
+# Whitespace next to these never renders, so it is dropped; next to inline
+# elements and text it still separates words and becomes a single space.
+BLOCK_ELEMENTS = frozenset((
+    "address", "article", "aside", "base", "blockquote", "body", "dd", "details", "dialog", "div", "dl", "dt",
+    "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "head", "header",
+    "hgroup", "hr", "html", "li", "link", "main", "meta", "nav", "noscript", "ol", "p", "pre", "script",
+    "section", "style", "summary", "table", "tbody", "td", "tfoot", "th", "thead", "title", "tr", "ul",
+))
+
+
+def _is_block_tag(text, start) -> bool:
+    # Doctypes and comments ("<!") count as block-level.
+    if text.startswith("<!", start):
+        return True
+    match = TAG_NAME_PATTERN.match(text, start)
+    return match is not None and match.group(1).lower() in BLOCK_ELEMENTS
+
+
+def _collapse_whitespace(text, start, end) -> str:
+    if start == 0 or end == len(text):
+        return ""
+    if text[start - 1] == ">" and _is_block_tag(text, text.rfind("<", 0, start)):
+        return ""
+    if text[end] == "<" and _is_block_tag(text, end):
+        return ""
+    return " "
+
+
+def minify_html(text) -> str:
+    """Collapses whitespace runs to a single space, dropping those at the edges and next to block-level tags.
+
+    The contents of pre, code, textarea, script and style are left untouched.
+    """
+    preserved = iter([match.span() for match in PRESERVED_ELEMENT_PATTERN.finditer(text)])
+    span = next(preserved, None)
+    parts = []
+    position = 0
+    for match in WHITESPACE_PATTERN.finditer(text):
+        start, end = match.span()
+        while span is not None and span[1] <= start:
+            span = next(preserved, None)
+        if span is not None and span[0] <= start:
+            continue
+        parts.append(text[position:start])
+        parts.append(_collapse_whitespace(text, start, end))
+        position = end
+    parts.append(text[position:])
+    return "".join(parts)
+
+
 class HTMLNode:
 
+    # Documents are made of many thousands of small nodes, so they carry no
+    # per-instance __dict__.
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
         self.children = children
         self.props = props
 
-    def to_html(self):
+    def to_html(self, minify=False):
         raise NotImplementedError
+
+    def write_html(self, stream, minify=False):
+        """Writes this node's HTML to a text stream, chunk by chunk."""
+        stream.write(self.to_html(minify))
     
-    def props_to_html(self) -> None | str:
+    def props_to_html(self, minify=False) -> None | str:
         if self.props == None or self.props == {}:
             return ""
         
         props_pairs: str = ""
         for key, value in self.props.items():
-            props_pairs = props_pairs + f" {key}=\"{value}\""
+            if minify and UNQUOTED_VALUE_PATTERN.fullmatch(str(value)):
+                props_pairs = props_pairs + f" {key}={value}"
+            else:
+                props_pairs = props_pairs + f" {key}=\"{value}\""
         return props_pairs
     
     def __repr__(self) -> str:
@@ -34,25 +103,45 @@ class HTMLNode:
 
 class LeafNode(HTMLNode):
 
+    __slots__ = ()
+
     def __init__(self, value, tag=None, props=None):
         super().__init__(tag, None, None, props)
         self.value = value
     
-    def to_html(self):
+    def to_html(self, minify=False):
         if self.tag == "img":
-            props_attr = super().props_to_html()
+            props_attr = super().props_to_html(minify)
+            # A trailing "/" would be read as part of an unquoted value, and void elements don't need it.
+            if minify:
+                return f"<{self.tag}{props_attr}>"
             return f"<{self.tag}{props_attr}/>"
         
         elif self.tag == "text":
             return f"{self.value}"
         
-        props_attr = super().props_to_html()
+        props_attr = super().props_to_html(minify)
         return f"<{self.tag}{props_attr}>{self.value}</{self.tag}>"
 
 
 
+class RawNode(LeafNode):
+    """Already rendered HTML, written out verbatim."""
+
+    __slots__ = ()
+
+    def __init__(self, value):
+        super().__init__(value)
+
+    def to_html(self, minify=False):
+        return self.value
+
+
+
 class ParentNode(HTMLNode):
 
+    __slots__ = ()
+
     def __init__(self, children, tag=None, props=None):
         super().__init__(tag, None, None, props)
         self.children = children
@@ -60,13 +149,27 @@ class ParentNode(HTMLNode):
         if self.children == None:
             raise ValueError("A list of children is required for this class object")
 
-    def to_html(self):
+    def to_html(self, minify=False):
         if self.tag == None:
             raise ValueError("ParentNode is missing the required tag")
         elif len(self.children) == 0:
             raise ValueError("ParentNode is missing the required children")
-        
-        html_string = ""
+
+        buffer = io.StringIO()
+        self.write_html(buffer, minify)
+        return buffer.getvalue()
+
+    def write_html(self, stream, minify=False):
+        if self.tag == None:
+            raise ValueError("ParentNode is missing the required tag")
+        elif len(self.children) == 0:
+            raise ValueError("ParentNode is missing the required children")
+
+        write = stream.write
+        write(f"<{self.tag}>")
         for child in self.children:
-            html_string += "".join(child.to_html())
-        return f"<{self.tag}>{html_string}</{self.tag}>"
+            if isinstance(child, LeafNode):
+                write(child.to_html(minify))
+            else:
+                child.write_html(stream, minify)
+        write(f"</{self.tag}>")
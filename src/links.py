@@ -0,0 +1,76 @@
+import os, posixpath
+from urllib.parse import unquote, urlsplit
+
+
+def output_url(path, root) -> str:
+    """The site URL of an output file, e.g. public/blog/index.html -> /blog/index.html."""
+    rel_path = os.path.relpath(path, root).replace(os.sep, "/")
+    return "/" + rel_path
+
+
+class LinkIndex:
+    """Every URL the built site serves, for constant-time link checking.
+
+    Pages are added with the ids they define, so fragment links can be checked
+    too. A link resolves when its path names a page or asset, or a directory
+    whose index.html is a page.
+    """
+
+    def __init__(self):
+        self.targets = set()
+        self.anchors = {}
+
+    def add_page(self, url, anchors=()):
+        self.targets.add(url)
+        self.anchors[url] = set(anchors)
+
+    def add_asset(self, url):
+        self.targets.add(url)
+
+    def resolve(self, target, base_url):
+        """Returns the URL `target` points to from the page at `base_url`.
+
+        None is returned when the target is missing; links to other sites and
+        non-HTTP schemes like mailto: are never checked and resolve to themselves.
+        """
+        parts = urlsplit(target)
+        if parts.scheme or parts.netloc:
+            return target
+
+        path = unquote(parts.path)
+        if not path:
+            url = base_url
+        else:
+            if not path.startswith("/"):
+                path = posixpath.join(posixpath.dirname(base_url), path)
+            url = posixpath.normpath(path)
+            if path.endswith("/") and url != "/":
+                url += "/"
+
+            if url not in self.targets:
+                index_url = posixpath.join(url, "index.html")
+                if index_url not in self.targets:
+                    return None
+                url = index_url
+
+        if parts.fragment and parts.fragment not in self.anchors.get(url, ()):
+            return None
+        return url
+
+    def broken_links(self, pages):
+        """Checks the links of every page.
+
+        Args:
+            pages (iterable(tuple(str, str, lst([tuple(str, str)])))): (source,
+                page URL, (kind, target) links) for each page
+
+        Returns:
+            lst([tuple(str, str, str)]): (source, kind, target) of each link
+            that doesn't resolve, in page order.
+        """
+        broken = []
+        for source, url, links in pages:
+            for kind, target in links:
+                if self.resolve(target, url) is None:
+                    broken.append((source, kind, target))
+        return broken
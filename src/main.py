@@ -1,67 +1,913 @@
-import os, shutil, errno
-from mod_markdown import markdown_to_html_node, extract_title
-from pathlib import Path
+import os, io, json, shutil, argparse, time, logging, logging.handlers, sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from mod_markdown import BlockCache, markdown_to_html_node, extract_title, write_markdown_html
+from manifest import BuildManifest, hash_bytes, hash_file
+from template import load_template, select_template
+from assets import fingerprint_name, sync_static
+from discovery import TreeIndex
+from watch import LiveReload, serve, watch
+from profiling import BuildProfiler, NullProfile, PageProfile, count_nodes
+from parse_cache import ParseCache
+from pipeline import run_pipeline
+from compress import precompress_tree, remove_siblings
+from links import LinkIndex, output_url
+from search import SearchStore, page_entry, write_search_index
+from shards import merge_shards, parse_shard, select_shard, shard_directory
+from ondemand import PageCache, make_on_demand_server
+from config import BuildConfig
 
-dir_path_static = "./static"
-dir_path_public = "./public"
-dir_path_content = "./content"
-template_path = "./template.html"
+asset_manifest_name = "asset-manifest.json"
+shards_path = "./shards"
+
+logger = logging.getLogger("ssg")
+
+# One block cache per process, so pool workers keep theirs across pages.
+_block_cache = None
 
 def main():
+    args = parse_args()
+    configure_logging(args.log_level)
+    try:
+        run(args)
+    finally:
+        # Buffered records come out before the traceback of a failed build.
+        flush_logs()
+
+
+def run(args):
+    config = BuildConfig.from_args(args)
+    if args.merge_shards:
+        merge(config, args)
+        return
+    if args.serve:
+        serve_on_demand(config, args)
+        return
+    if args.shard:
+        # Each shard writes its pages and manifest under shards/K-of-N/, so CI
+        # runners can hand them over separately to the merge step.
+        config = config.with_output(shard_directory(shards_path, *args.shard))
+
+    if args.force:
+        manifest = BuildManifest(config.manifest)
+        if os.path.exists(config.public):
+            shutil.rmtree(config.public)
+    else:
+        manifest = BuildManifest.load(config.manifest)
+
+    if not args.watch:
+        profiler = BuildProfiler() if args.profile or args.memory_report else None
+        build(config, args, manifest, profiler)
+        if args.profile:
+            write_profile(profiler, args.profile)
+        if args.memory_report:
+            logger.info("%s", profiler.memory_summary())
+        return
+
+    try:
+        build(config, args, manifest)
+    except BuildError as err:
+        logger.error("%s", err)
+    flush_logs()
+
+    live_reload = LiveReload()
+    serve(config.public, args.port, live_reload)
+    logger.info("Serving %s on http://localhost:%d/ and watching for changes", config.public, args.port)
+    flush_logs()
+
+    roots = [config.content, config.static, config.template] + list(config.layouts.values())
+    try:
+        watch(roots, lambda changed, removed, files: rebuild_changed(config, args, manifest, live_reload, changed,
+                                                                     removed))
+    except KeyboardInterrupt:
+        pass
+
+
+def serve_on_demand(config, args):
+    # Nothing is built up front: each page is rendered when first requested and
+    # kept until its source or template changes, so startup doesn't grow with the site.
+    def render(from_path):
+        page_template = select_template(from_path, config.template, config.layouts)
+        with open(from_path, "r", encoding="utf-8") as md:
+            markdown = md.read()
+        logger.debug("Rendering %s", from_path)
+        return render_page(markdown, page_template, config.slots, minify=config.minify), [from_path, page_template]
+
+    page_cache = PageCache(args.page_cache_size * 1024 * 1024)
+    server = make_on_demand_server(config.content, config.static, args.port, render, page_cache)
+    logger.info("Serving %s on demand on http://localhost:%d/", config.content, args.port)
+    flush_logs()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.debug("Page cache: %d hits, %d misses", page_cache.hits, page_cache.misses)
+
+
+def merge(config, args):
+    """Combines shards/K-of-N/ for every K into public/ and a manifest of the whole site."""
+    count = args.merge_shards
+    directories = [shard_directory(shards_path, index, count) for index in range(1, count + 1)]
+    copied, removed = merge_shards([config.with_output(directory).public for directory in directories],
+                                   config.public, hardlink=args.hardlink_assets)
+
+    # Outputs keep their mtime when merged, so the combined manifest lets a later
+    # unsharded build skip every page that is still fresh.
+    manifest = BuildManifest(config.manifest)
+    for directory in directories:
+        shard = config.with_output(directory)
+        if not os.path.exists(shard.manifest):
+            raise FileNotFoundError(f"Missing shard manifest {shard.manifest}")
+        shard_manifest = BuildManifest.load(shard.manifest)
+        for source, entry in shard_manifest.pages.items():
+            rel_path = os.path.relpath(entry["dest"], shard.public)
+            manifest.pages[source] = dict(entry, dest=os.path.normpath(os.path.join(config.public, rel_path)))
+        manifest.graph.edges.update(shard_manifest.graph.edges)
+        manifest.assets = sorted(set(manifest.assets) | set(shard_manifest.assets))
+        manifest.fingerprints.update(shard_manifest.fingerprints)
+    manifest.save()
+    logger.info("Merged %d shard(s) into %s: %d file(s) copied, %d removed", count, config.public, len(copied),
+                len(removed))
+
+    if args.check_links:
+        pages = [(source, entry["dest"]) for source, entry in sorted(manifest.pages.items())]
+        check_links(config, pages, manifest)
+
+    if args.precompress:
+        precompress(config)
+    else:
+        remove_compressed_siblings(os.path.join(config.public, rel_path) for rel_path in copied + removed)
+
+
+def build(config, args, manifest, profiler=None):
+    # Output files this build writes or deletes, whose compressed siblings are now stale.
+    outputs = copy_files(config.static, config.public, manifest, use_hash=args.hash_assets,
+                         hardlink=args.hardlink_assets, jobs=config.jobs, fingerprint=args.fingerprint_assets)
+    tree_index = TreeIndex(config.tree_index) if args.force else TreeIndex.load(config.tree_index)
+    pages = discover_pages(config.content, config.public, tree_index)
+    tree_index.save()
+    logger.debug("Discovered %d page(s), listed %d changed director(ies)", len(pages), tree_index.listed)
+    if args.shard:
+        pages = select_shard(pages, config.content, *args.shard)
+        logger.info("Building shard %d of %d: %d page(s)", args.shard[0], args.shard[1], len(pages))
+    sources = [from_path for from_path, _ in pages]
+    parse_cache = make_parse_cache(config)
+    search_store = SearchStore(config.search_store) if args.search else None
+
+    try:
+        build_pages(pages, config, manifest, profiler=profiler, parse_cache=parse_cache, search_store=search_store,
+                    asset_urls=asset_urls(manifest), written=outputs)
+    finally:
+        # Keep the pages that did build, even when others failed.
+        for dest_path in manifest.remove_stale(sources):
+            logger.info("Removed stale page %s", dest_path)
+            outputs.append(dest_path)
+        manifest.save()
+        if parse_cache is not None:
+            parse_cache.evict()
+        if not args.precompress:
+            remove_compressed_siblings(outputs)
+
+    if search_store is not None:
+        search_files = build_search_index(config, pages, manifest, search_store)
+        if not args.precompress:
+            remove_compressed_siblings(search_files)
+
+    if args.check_links:
+        check_links(config, pages, manifest)
+
+    if args.precompress:
+        precompress(config)
+
+
+def check_links(config, pages, manifest):
+    """Resolves every page's links against the pages and assets of this build.
+
+    Links come from the manifest, so pages skipped as fresh are checked without
+    being parsed again.
+    """
+    index = LinkIndex()
+    for from_path, dest_path in pages:
+        page_template = load_template(select_template(from_path, config.template, config.layouts))
+        index.add_page(output_url(dest_path, config.public), page_template.ids)
+    for rel_path in manifest.assets:
+        index.add_asset(output_url(os.path.join(config.public, rel_path), config.public))
+
+    broken = index.broken_links(
+        (from_path, output_url(dest_path, config.public), manifest.pages.get(from_path, {}).get("links", ()))
+        for from_path, dest_path in pages)
+    if broken:
+        raise BrokenLinksError(broken)
+    logger.info("Checked links of %d page(s)", len(pages))
+
+
+def build_search_index(config, pages, manifest, search_store) -> list:
+    """Writes the search index of every page to public/search from the stored entries.
+
+    Returns the paths of the index files.
+    """
+    entries = []
+    source_hashes = []
+    for from_path, dest_path in pages:
+        source_hash = manifest.pages.get(from_path, {}).get("source")
+        entry = search_store.get(source_hash) if source_hash is not None else None
+        if entry is not None:
+            entries.append((output_url(dest_path, config.public), entry))
+            source_hashes.append(source_hash)
+
+    directory = os.path.join(config.public, "search")
+    written, removed = write_search_index(entries, directory)
+    search_store.prune(source_hashes)
+    logger.info("Search index: %d page(s), %d file(s) written, %d removed", len(entries), written, removed)
+    return [os.path.join(directory, filename) for filename in os.listdir(directory) if filename.endswith(".json")]
+
+
+def precompress(config):
+    jobs = config.jobs if config.jobs > 0 else os.cpu_count() or 1
+    written, removed = precompress_tree(config.public, jobs=jobs)
+    logger.info("Precompressed %d file(s), removed %d stale sibling(s)", written, removed)
+
+
+def remove_compressed_siblings(paths):
+    # Without --precompress, .gz/.br/.zst siblings left by an earlier build would
+    # still be served for files this build rewrote or deleted.
+    removed = remove_siblings(paths)
+    if removed:
+        logger.info("Removed %d stale compressed sibling(s)", removed)
+
+
+def make_parse_cache(config):
+    if config.parse_cache_size <= 0:
+        return None
+    return ParseCache(config.parse_cache, config.parse_cache_size * 1024 * 1024)
+
+
+def configure_logging(level):
+    # Records are buffered and written in batches; errors flush immediately.
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    handler = logging.handlers.MemoryHandler(1024, flushLevel=logging.ERROR, target=stream_handler)
+    logger.handlers[:] = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+def flush_logs():
+    # Called at phase boundaries, so long-running modes don't sit on buffered output.
+    for handler in logger.handlers:
+        handler.flush()
+
+
+def write_profile(profiler, directory):
+    os.makedirs(directory, exist_ok=True)
+    profiler.write_json(os.path.join(directory, "profile.json"))
+    profiler.write_trace(os.path.join(directory, "trace.json"))
+    logger.info("%s", profiler.summary())
+    logger.info("Wrote profile.json and trace.json to %s", directory)
+
+
+def rebuild_changed(config, args, manifest, live_reload, changed, removed):
+    """Rebuilds only what the changed files affect, then tells open tabs to reload."""
+    start = time.perf_counter()
+    try:
+        rebuilt = _rebuild_pages(config, args, manifest, changed, removed)
+    except OSError as err:
+        # Editors that save by deleting and rewriting leave a file missing for a
+        # moment; the watcher keeps running and the next change rebuilds again.
+        logger.error("Rebuild failed: %s", err)
+        flush_logs()
+        return
+
+    live_reload.notify()
+    logger.info("Rebuilt %d page(s) in %.0f ms", rebuilt, (time.perf_counter() - start) * 1000)
+    flush_logs()
+
+
+def _rebuild_pages(config, args, manifest, changed, removed) -> int:
+    # Returns the number of pages rebuilt.
+    outputs = []
+    if any(_is_under(path, config.static) for path in changed | removed):
+        outputs = copy_files(config.static, config.public, manifest, use_hash=args.hash_assets,
+                             hardlink=args.hardlink_assets, jobs=config.jobs, fingerprint=args.fingerprint_assets)
+
+    # Only directories that changed since the last listing are listed again.
+    tree_index = TreeIndex.load(config.tree_index)
+    content_pages = discover_pages(config.content, config.public, tree_index)
+    tree_index.save()
+    sources = [from_path for from_path, _ in content_pages]
+    changed_templates = {path for path in changed if not _is_under(path, config.content)
+                         and not _is_under(path, config.static)}
+
+    # Pages built before are rebuilt from the dependency graph; new ones by their layout.
+    dependents = manifest.graph.dependents(changed | removed)
+    pages = []
+    for from_path, dest_path in content_pages:
+        if (from_path in changed or from_path in dependents
+                or (from_path not in manifest.graph.edges
+                    and select_template(from_path, config.template, config.layouts) in changed_templates)):
+            pages.append((from_path, dest_path))
+
+    search_store = SearchStore(config.search_store) if args.search else None
+    try:
+        build_pages(pages, config, manifest, parse_cache=make_parse_cache(config), search_store=search_store,
+                    asset_urls=asset_urls(manifest), written=outputs)
+    except BuildError as err:
+        logger.error("%s", err)
+    finally:
+        for dest_path in manifest.remove_stale(sources):
+            logger.info("Removed stale page %s", dest_path)
+            outputs.append(dest_path)
+        manifest.save()
+        if not args.precompress:
+            remove_compressed_siblings(outputs)
+
+    if search_store is not None:
+        search_files = build_search_index(config, content_pages, manifest, search_store)
+        if not args.precompress:
+            remove_compressed_siblings(search_files)
+
+    if args.check_links:
+        try:
+            check_links(config, content_pages, manifest)
+        except BuildError as err:
+            logger.error("%s", err)
+
+    if args.precompress:
+        precompress(config)
+    return len(pages)
+
+
+def _is_under(path, directory):
+    return os.path.normpath(path).startswith(os.path.normpath(directory) + os.sep)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static site into ./public")
+    parser.add_argument("--force", action="store_true",
+                        help="ignore the build manifest and rebuild every page")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of worker processes for page generation (0 = one per CPU)")
+    parser.add_argument("--layout", action="append", type=_key_value, default=[], metavar="PATH=TEMPLATE",
+                        help="use TEMPLATE for the content file or directory PATH (repeatable)")
+    parser.add_argument("--slot", action="append", type=_key_value, default=[], metavar="NAME=VALUE",
+                        help="fill {{ NAME }} in every template with VALUE (repeatable)")
+    parser.add_argument("--hash-assets", action="store_true",
+                        help="compare static files by content hash when their mtime differs")
+    parser.add_argument("--hardlink-assets", action="store_true",
+                        help="hardlink static files into the output instead of copying them")
+    parser.add_argument("--fingerprint-assets", action="store_true",
+                        help="write static files under content-hashed names, list them in "
+                             f"public/{asset_manifest_name} and point pages at them")
+    parser.add_argument("--watch", action="store_true",
+                        help="serve the site, rebuild what changes and reload open browser tabs")
+    parser.add_argument("--serve", action="store_true",
+                        help="serve the site without building it, rendering each page when first requested")
+    parser.add_argument("--page-cache-size", type=int, default=64, metavar="MB",
+                        help="size limit of the pages --serve keeps in memory (default: 64)")
+    parser.add_argument("--port", type=int, default=8888,
+                        help="port for --watch and --serve (default: 8888)")
+    parser.add_argument("--profile", nargs="?", const="./.cache/profile", metavar="DIR",
+                        help="record per-page stage timings to DIR/profile.json and DIR/trace.json")
+    parser.add_argument("--log-level", default="INFO", type=str.upper,
+                        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="logging verbosity (default: INFO)")
+    parser.add_argument("--stream-threshold", type=int, default=32 * 1024 * 1024, metavar="BYTES",
+                        help="render markdown files of at least BYTES block by block with bounded memory "
+                             "(0 = every file, default: 32 MiB)")
+    parser.add_argument("--parse-cache-size", type=int, default=0, metavar="MB",
+                        help="keep rendered page bodies in an on-disk cache of up to MB, for repeated --force or "
+                             "CI builds of unchanged sources; filling it serializes each body in memory instead of "
+                             "streaming it (default: 0 = disabled)")
+    parser.add_argument("--block-cache-size", type=int, default=4096, metavar="ENTRIES",
+                        help="rendered blocks remembered per process for reuse across pages (0 = disabled, default: 4096)")
+    parser.add_argument("--async-io", action="store_true",
+                        help="overlap source reads, rendering and output writes in an asyncio pipeline "
+                             "(for high-latency storage such as NFS)")
+    parser.add_argument("--low-memory", action="store_true",
+                        help="bound memory for constrained containers: stream every page block by block and "
+                             "keep at most two pages per worker in flight")
+    parser.add_argument("--memory-report", nargs="?", type=int, const=5, metavar="SITES",
+                        help="trace allocations while building and log the peak RSS, plus each of the largest "
+                             "pages' peak memory and top SITES allocation sites (default: 5)")
+    parser.add_argument("--precompress", action="store_true",
+                        help="write .gz (and .br/.zst when available) siblings of changed pages and assets")
+    parser.add_argument("--check-links", action="store_true",
+                        help="fail the build when a link or image points at a page, asset or anchor that doesn't exist")
+    parser.add_argument("--search", action="store_true",
+                        help="write a sharded client-side search index to public/search")
+    parser.add_argument("--minify", action="store_true",
+                        help="collapse whitespace between tags and drop redundant attribute quotes while writing pages")
+    parser.add_argument("--shard", type=parse_shard, metavar="K/N",
+                        help="build only the pages of shard K of N (by a stable hash of their path) into "
+                             f"{shards_path}/K-of-N/")
+    parser.add_argument("--merge-shards", type=int, metavar="N",
+                        help=f"combine {shards_path}/1-of-N/ ... N-of-N/ into the site, failing on conflicting files")
+    args = parser.parse_args(argv)
+
+    if args.shard:
+        # These need every page of the site; run them on the merged output instead.
+        for option, name in ((args.watch, "--watch"), (args.search, "--search"), (args.check_links, "--check-links")):
+            if option:
+                parser.error(f"--shard can't be combined with {name}")
+    if args.merge_shards is not None and (args.merge_shards < 1 or args.shard or args.search or args.watch):
+        parser.error("--merge-shards needs N >= 1 and can't be combined with --shard, --search or --watch")
+    if args.low_memory and args.async_io:
+        parser.error("--low-memory can't be combined with --async-io, which holds whole pages in memory")
+    if args.memory_report is not None and args.memory_report < 1:
+        parser.error("--memory-report needs SITES >= 1")
+    if args.serve and (args.watch or args.shard or args.merge_shards is not None):
+        parser.error("--serve can't be combined with --watch, --shard or --merge-shards")
+    return args
+
+
+def _key_value(text):
+    key, sep, value = text.partition("=")
+    if not sep or not key:
+        raise argparse.ArgumentTypeError(f"expected KEY=VALUE, got {text!r}")
+    return key, value
+
+
+class BuildError(Exception):
+
+    def __init__(self, failures):
+        self.failures = failures
+        lines = [f"{from_path}: {err!r}" for from_path, err in failures]
+        super().__init__(f"{len(failures)} page(s) failed to build:\n" + "\n".join(lines))
+
+
+class BrokenLinksError(BuildError):
+
+    def __init__(self, broken):
+        self.failures = broken
+        lines = [f"{from_path}: broken {kind} {target}" for from_path, kind, target in broken]
+        Exception.__init__(self, f"{len(broken)} broken link(s):\n" + "\n".join(lines))
+
 
-    copy_files(dir_path_static, dir_path_public)
-    generate_pages_recursive(dir_path_content, template_path, dir_path_public)
+def _dest_path(rel_path, dest_dir_path):
+    return os.path.normpath(os.path.join(dest_dir_path, os.path.splitext(rel_path)[0] + ".html"))
 
 
+def discover_pages(dir_path_content, dest_dir_path, tree_index=None):
+    """Walks the content directory and returns every (source, destination) pair, sorted.
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path): # This function written by boot.dev
-    
-    for filename in os.listdir(dir_path_content):
-        from_path = os.path.join(dir_path_content, filename)
-        dest_path = os.path.join(dest_dir_path, filename)
-        if os.path.isfile(from_path):
-            dest_path = Path(dest_path).with_suffix(".html")
-            generate_page(from_path, template_path, dest_path)
+    Ignored files (see discovery.IGNORE_PATTERNS) are skipped. A `tree_index`
+    lets directories that haven't changed since the last build skip listing.
+    """
+    tree_index = tree_index or TreeIndex()
+    return [(os.path.join(dir_path_content, rel_path), _dest_path(rel_path, dest_dir_path))
+            for rel_path in tree_index.files(dir_path_content)]
+
+
+def build_pages(pages, config, manifest=None, profiler=None, parse_cache=None, search_store=None, asset_urls=None,
+                written=None):
+    """Generates the given pages, serially or across a process pool.
+
+    Each page is rendered with the layout chosen by select_template from
+    `config.template` and `config.layouts`. Pages that are fresh according to
+    `manifest` are skipped. Every page is attempted; failures are collected and
+    raised together as a BuildError once the rest of the build has been written
+    and recorded. Each generated page's template, the fingerprinted assets that
+    template references and the static assets the page links to are recorded
+    in the manifest's dependency graph, and a page is rebuilt when any of them
+    changes. When a profiler is given, every generated page's stage
+    timings are added to it. Bodies are looked up in and added to `parse_cache`
+    when one is given. With a `search_store`, the text of every generated page
+    is tokenized while it is parsed and its search entry stored; pages without
+    an entry are rebuilt. `asset_urls` maps static asset URLs to fingerprinted
+    ones, for templates and for images and links in the markdown. The
+    destination of every generated page is appended to `written`.
+
+    The remaining options come from `config`:
+    - `jobs` processes render the pages; 0 means one per CPU.
+    - Sources of at least `stream_threshold` bytes are rendered by streaming
+      (see generate_page).
+    - Repeated blocks are reused through a per-process BlockCache of
+      `block_cache_size` entries.
+    - With `async_io`, pages go through the read/render/write pipeline instead
+      (see _build_pages_async); that mode holds whole sources in memory, so
+      `stream_threshold` does not apply to it.
+    - With `minify`, pages are serialized minified (see minify_html).
+    - Results are recorded as pages finish; with `max_in_flight`, at most that
+      many pages are handed to the pool ahead of the one being recorded.
+    - With `memory_sites`, the profiles given to `profiler` also report memory
+      (see PageProfile).
+    """
+    slots_hash = hash_bytes(repr((sorted(config.slots.items()), config.minify)).encode("utf-8"))
+
+    # Only the renamed assets a template references are part of its key, and
+    # their static files are dependencies of every page using the template.
+    template_assets = {}
+
+    failures = []
+    pending = []
+    for from_path, dest_path in pages:
+        page_template = select_template(from_path, config.template, config.layouts)
+        if manifest is None:
+            pending.append((from_path, page_template, dest_path, None, None))
+            continue
+
+        # A source or template deleted since discovery fails that page like any other error.
+        try:
+            source_hash = hash_file(from_path)
+            if page_template not in template_assets:
+                used_assets = load_template(page_template, config.minify, asset_urls).assets
+                static_paths = [os.path.join(config.static, url.lstrip("/")) for url in sorted(used_assets)]
+                template_assets[page_template] = (repr(sorted(used_assets.items())), static_paths)
+            assets_key = template_assets[page_template][0]
+            template_hash = hash_bytes(
+                f"{manifest.template_hash(page_template)}:{slots_hash}:{assets_key}".encode("utf-8"))
+        except OSError as err:
+            failures.append((from_path, err))
+            continue
+        if (not manifest.is_fresh(from_path, source_hash, template_hash, dest_path) or manifest.graph.is_stale(from_path)
+                or (search_store is not None and not search_store.has(source_hash))):
+            pending.append((from_path, page_template, dest_path, source_hash, template_hash))
+
+    jobs = config.jobs if config.jobs > 0 else os.cpu_count() or 1
+    options = {
+        "slots": config.slots,
+        "profile": profiler is not None,
+        "stream_threshold": config.stream_threshold,
+        "parse_cache": (parse_cache.directory, parse_cache.max_bytes) if parse_cache is not None else None,
+        "block_cache_size": config.block_cache_size,
+        "minify": config.minify,
+        "search": search_store is not None,
+        "asset_urls": asset_urls or None,
+        "memory_sites": config.memory_sites,
+    }
+
+    if config.async_io and pending:
+        results = _build_pages_async(pending, options, jobs)
+    elif jobs <= 1 or len(pending) <= 1:
+        results = (_generate_page_job(from_path, page_template, dest_path, options)
+                   for from_path, page_template, dest_path, _, _ in pending)
+    else:
+        results = _generate_pages_in_pool(pending, options, min(jobs, len(pending)), config.max_in_flight)
+
+    asset_index = LinkIndex()
+    if manifest is not None:
+        for rel_path in manifest.assets:
+            asset_index.add_asset(output_url(os.path.join(config.public, rel_path), config.public))
+
+    block_hits = block_misses = 0
+    for (from_path, page_template, dest_path, source_hash, template_hash), (output_hash, err, page_profile, block_stats, links, search_entry) in zip(pending, results):
+        block_hits += block_stats[0]
+        block_misses += block_stats[1]
+        if err is not None:
+            failures.append((from_path, err))
+            continue
+
+        logger.info("Generated page from %s to %s using %s", from_path, dest_path, page_template)
+        if written is not None:
+            written.append(dest_path)
+        if profiler is not None:
+            profiler.add(page_profile)
+        if manifest is not None:
+            manifest.record(from_path, source_hash, template_hash, dest_path, output_hash, links)
+            dependencies = _asset_dependencies(config, dest_path, links, asset_index)
+            manifest.graph.record(from_path, [page_template] + template_assets[page_template][1] + dependencies)
+        if search_store is not None and source_hash is not None:
+            search_store.put(source_hash, search_entry)
+
+    if block_hits or block_misses:
+        logger.info("Block cache: %d hits, %d misses", block_hits, block_misses)
+
+    if failures:
+        raise BuildError(failures)
+
+
+def _asset_dependencies(config, dest_path, links, asset_index):
+    # The static files behind the page's links and images that resolve to assets.
+    page_url = output_url(dest_path, config.public)
+    dependencies = []
+    for _, target in links:
+        url = asset_index.resolve(target, page_url)
+        if url in asset_index.targets:
+            dependencies.append(os.path.join(config.static, url.lstrip("/")))
+    return sorted(set(dependencies))
+
+
+def _generate_pages_in_pool(pending, options, workers, max_in_flight=None):
+    # Yields results in page order as they arrive, so each is recorded and
+    # released rather than the whole build's results being held at once.
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        if max_in_flight is None:
+            yield from executor.map(_generate_page_job,
+                                    [page[0] for page in pending],
+                                    [page[1] for page in pending],
+                                    [page[2] for page in pending],
+                                    [options] * len(pending),
+                                    chunksize=max(1, len(pending) // (workers * 8)))
+            return
+
+        submitted = deque()
+        for from_path, page_template, dest_path, _, _ in pending:
+            if len(submitted) >= max_in_flight:
+                yield submitted.popleft().result()
+            submitted.append(executor.submit(_generate_page_job, from_path, page_template, dest_path, options))
+        while submitted:
+            yield submitted.popleft().result()
+
+
+def _generate_page_job(from_path, template_path, dest_path, options):
+    # Exceptions are returned rather than raised so one broken page doesn't abort the pool.
+    page_profile = PageProfile(from_path, options["memory_sites"]) if options["profile"] else NullProfile()
+    parse_cache = ParseCache(*options["parse_cache"]) if options["parse_cache"] else None
+    block_cache = _get_block_cache(options["block_cache_size"], options["minify"], options["asset_urls"])
+    hits, misses = (block_cache.hits, block_cache.misses) if block_cache is not None else (0, 0)
+    links = []
+    texts = [] if options["search"] else None
+
+    try:
+        output_hash = generate_page(from_path, template_path, dest_path, options["slots"], page_profile,
+                                    options["stream_threshold"], parse_cache, block_cache, options["minify"], links,
+                                    texts, options["asset_urls"])
+        result = output_hash, None, page_profile.to_dict()
+    except Exception as err:
+        result = None, err, None
+
+    if block_cache is not None:
+        hits, misses = block_cache.hits - hits, block_cache.misses - misses
+    return result + ((hits, misses), links, page_entry(texts) if texts is not None else None)
+
+
+def _build_pages_async(pending, options, jobs):
+    # Reads and writes overlap on I/O threads while rendering runs in a process
+    # pool, or in a single thread so the event loop stays free for I/O.
+    def read(page):
+        with open(page[0], "r", encoding="utf-8") as md:
+            return md.read()
+
+    def write(page, rendered):
+        data, page_profile, block_stats, links, search_entry = rendered
+        with open(page[2], "wb") as dest:
+            dest.write(data)
+        return hash_bytes(data), page_profile, block_stats, links, search_entry
+
+    if jobs > 1:
+        render_executor = ProcessPoolExecutor(max_workers=min(jobs, len(pending)))
+    else:
+        render_executor = ThreadPoolExecutor(max_workers=1)
+
+    with render_executor:
+        outcomes = run_pipeline(pending, read, partial(_render_page_job, options=options), write,
+                                destination=lambda page: page[2], render_executor=render_executor,
+                                render_workers=max(1, jobs) * 2)
+
+    results = []
+    for written, err in outcomes:
+        if err is not None:
+            results.append((None, err, None, (0, 0), [], None))
         else:
-            generate_pages_recursive(from_path, template_path, dest_path)
+            results.append((written[0], None) + written[1:])
+    return results
+
+
+def _render_page_job(page, markdown, options):
+    from_path, template_path = page[0], page[1]
+    page_profile = PageProfile(from_path, options["memory_sites"]) if options["profile"] else NullProfile()
+    parse_cache = ParseCache(*options["parse_cache"]) if options["parse_cache"] else None
+    block_cache = _get_block_cache(options["block_cache_size"], options["minify"], options["asset_urls"])
+    hits, misses = (block_cache.hits, block_cache.misses) if block_cache is not None else (0, 0)
+    links = []
+    texts = [] if options["search"] else None
+
+    html = render_page(markdown, template_path, options["slots"], page_profile, parse_cache, block_cache,
+                       options["minify"], links, texts, options["asset_urls"])
+
+    if block_cache is not None:
+        hits, misses = block_cache.hits - hits, block_cache.misses - misses
+    search_entry = page_entry(texts) if texts is not None else None
+    return html.encode("utf-8"), page_profile.to_dict(), (hits, misses), links, search_entry
+
+
+def _get_block_cache(max_entries, minify=False, asset_urls=None):
+    global _block_cache
+    if max_entries <= 0:
+        return None
+    if (_block_cache is None or _block_cache.max_entries != max_entries or _block_cache.minify != minify
+            or _block_cache.asset_urls != asset_urls):
+        _block_cache = BlockCache(max_entries, minify=minify, asset_urls=asset_urls)
+    return _block_cache
+
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, manifest=None): # This function written by boot.dev
+    pages = discover_pages(dir_path_content, dest_dir_path)
+    build_pages(pages, BuildConfig(content=dir_path_content, public=dest_dir_path, template=template_path), manifest)
+    return [from_path for from_path, _ in pages]
 
-def generate_page(from_path, template_path, dest_path):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+class StreamedMarkdown:
+    """Content slot value that renders a markdown file block by block as it is written."""
 
-    with open(from_path, "r") as md:
-        markdown = md.read()
+    def __init__(self, path, block_cache=None, links=None, texts=None, asset_urls=None):
+        self.path = path
+        self.block_cache = block_cache
+        self.links = links
+        self.texts = texts
+        self.asset_urls = asset_urls
 
-    title = extract_title(markdown)
-    markdown_node = markdown_to_html_node(markdown)
-    html_string = markdown_node.to_html() 
+    def write_html(self, stream, minify=False):
+        with open(self.path, "r", encoding="utf-8") as md:
+            write_markdown_html(md, stream, self.block_cache, minify, self.links, self.texts, self.asset_urls)
 
-    with open(template_path, "r") as temp:
-        template_html = temp.read()
 
-    final_html = template_html.replace("{{ Title }}", title)
-    final_html = final_html.replace("{{ Content }}", html_string)
- 
+def generate_page(from_path, template_path, dest_path, slots=None, profile=None, stream_threshold=None,
+                  parse_cache=None, block_cache=None, minify=False, links=None, texts=None, asset_urls=None):
+    profile = profile or NullProfile()
+
+    if stream_threshold is not None and os.path.getsize(from_path) >= stream_threshold:
+        return _generate_streamed_page(from_path, template_path, dest_path, slots, profile, block_cache, minify,
+                                       links, texts, asset_urls)
+
+    with profile.stage("read"):
+        with open(from_path, "r", encoding="utf-8") as md:
+            markdown = md.read()
+
+    values = _page_values(markdown, slots, profile, parse_cache, block_cache, minify, links, texts, asset_urls)
+    # The body is parsed; don't keep the source alive while the page is written.
+    del markdown
+
+    # Templates are compiled once per process; the body is streamed straight into
+    # the file between the template's literal segments.
+    with profile.stage("template"):
+        template = load_template(template_path, minify, asset_urls)
+
+    with profile.stage("render_write"):
+        _render_to_file(template, values, dest_path)
+
+    with profile.stage("hash"):
+        return hash_file(dest_path)
+
+
+def render_page(markdown, template_path, slots=None, profile=None, parse_cache=None, block_cache=None,
+                minify=False, links=None, texts=None, asset_urls=None) -> str:
+    """Renders a page to a string; the in-memory counterpart of generate_page."""
+    profile = profile or NullProfile()
+    values = _page_values(markdown, slots, profile, parse_cache, block_cache, minify, links, texts, asset_urls)
+
+    with profile.stage("template"):
+        template = load_template(template_path, minify, asset_urls)
+
+    with profile.stage("render"):
+        buffer = io.StringIO()
+        template.render(buffer, values)
+        return buffer.getvalue()
+
+
+def _page_values(markdown, slots, profile, parse_cache, block_cache, minify=False, links=None, texts=None,
+                 asset_urls=None):
+    # Link and image targets found while parsing are appended to `links`, and
+    # text runs to `texts`. Cached bodies don't keep their text, so a page whose
+    # text is wanted is always parsed.
+    with profile.stage("extract_title"):
+        title = extract_title(markdown)
+
+    content = None
+    if parse_cache is not None:
+        with profile.stage("parse_cache"):
+            source_hash = hash_bytes(markdown.encode("utf-8"))
+            if minify or asset_urls:
+                # Bodies differ by serialization and asset names, so those are part of the key.
+                variant = f"{source_hash}:{minify}:{sorted(asset_urls.items()) if asset_urls else ''}"
+                source_hash = hash_bytes(variant.encode("utf-8"))
+            entry = parse_cache.get_entry(source_hash) if texts is None else None
+        if entry is not None:
+            content, cached_links = entry
+            if links is not None:
+                links.extend(cached_links)
+
+    if content is None:
+        page_links = []
+        with profile.stage("parse"):
+            markdown_node = markdown_to_html_node(markdown, block_cache, page_links, texts, asset_urls)
+        if links is not None:
+            links.extend(page_links)
+
+        if isinstance(profile, PageProfile):
+            profile.counts["blocks"] = len(markdown_node.children)
+            profile.counts["nodes"] = count_nodes(markdown_node)
+            profile.counts["source_bytes"] = len(markdown)
+
+        content = markdown_node
+        if parse_cache is not None:
+            with profile.stage("parse_cache"):
+                content = markdown_node.to_html(minify)
+                parse_cache.put(source_hash, content, page_links)
+
+    values = dict(slots or {})
+    values["Title"] = title
+    values["Content"] = content
+    return values
+
+
+def _generate_streamed_page(from_path, template_path, dest_path, slots, profile, block_cache=None, minify=False,
+                            links=None, texts=None, asset_urls=None):
+    # Peak memory is bounded by the largest block: the title comes from the first
+    # line and the body is parsed and written one block at a time.
+    with profile.stage("extract_title"):
+        with open(from_path, "r", encoding="utf-8") as md:
+            title = extract_title(md.readline())
+
+    with profile.stage("template"):
+        template = load_template(template_path, minify, asset_urls)
+    values = dict(slots or {})
+    values["Title"] = title
+    values["Content"] = StreamedMarkdown(from_path, block_cache, links, texts, asset_urls)
+
+    with profile.stage("stream_render_write"):
+        _render_to_file(template, values, dest_path)
+
+    with profile.stage("hash"):
+        return hash_file(dest_path)
+
+
+def _render_to_file(template, values, dest_path):
+    # Pages are rendered into a temporary file that replaces the output only once
+    # complete, so a page failing partway through keeps its last good version.
     os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-    
-    with open(dest_path, "w+") as dest:
-        dest.write(final_html)
+    tmp_path = f"{dest_path}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as dest:
+            template.render(dest, values)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
 
 
-def copy_files(src, dest):
+def copy_files(src, dest, manifest=None, use_hash=False, hardlink=False, jobs=1, fingerprint=False) -> list:
+    """Syncs the static assets into `dest`; returns the output paths copied or removed."""
 
     if not os.path.exists(src):
         raise Exception("You are trying to access files from the wrong source directory.")
 
-    if os.path.exists(dest):
-        shutil.rmtree("./public")
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+
+    previous, known = (), {}
+    if manifest is not None:
+        known = manifest.fingerprints
+        previous = [known[rel_path][2] if rel_path in known else rel_path for rel_path in manifest.assets]
+
+    fingerprints = {}
+    rename = None
+    if fingerprint:
+        def rename(rel_path, stat):
+            # Only assets whose size or mtime changed are hashed again.
+            entry = known.get(rel_path)
+            if entry is None or entry[0] != stat.st_mtime_ns or entry[1] != stat.st_size:
+                digest = hash_file(os.path.join(src, rel_path))
+                entry = [stat.st_mtime_ns, stat.st_size, fingerprint_name(rel_path, digest)]
+            fingerprints[rel_path] = entry
+            return entry[2]
+
+    assets, copied, removed = sync_static(src, dest, previous, use_hash, hardlink, jobs, rename)
+    write_asset_manifest(dest, fingerprints)
 
+    for rel_path in copied:
+        logger.debug("Copied %s to %s", os.path.join(src, rel_path), os.path.join(dest, rel_path))
+    for rel_path in removed:
+        logger.info("Removed stale asset %s", os.path.join(dest, rel_path))
+
+    if manifest is not None:
+        manifest.assets = assets
+        manifest.fingerprints = fingerprints
+
+    outputs = [os.path.join(dest, fingerprints[rel_path][2] if rel_path in fingerprints else rel_path)
+               for rel_path in copied]
+    return outputs + [os.path.join(dest, rel_path) for rel_path in removed] + [os.path.join(dest, asset_manifest_name)]
+
+
+def write_asset_manifest(dest, fingerprints):
+    """Writes {asset path: fingerprinted path} to dest/asset-manifest.json, or removes it when empty."""
+    path = os.path.join(dest, asset_manifest_name)
+    if not fingerprints:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+
+    names = {rel_path.replace(os.sep, "/"): entry[2].replace(os.sep, "/") for rel_path, entry in fingerprints.items()}
+    data = json.dumps(names, indent=1, sort_keys=True)
     try:
-        shutil.copytree(src, dest)
-    except OSError as err:
-        if err.errno == errno.ENOTDIR:
-            shutil.copy2(src, dest)
-        else:
-            print("Error % s" % err)
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == data:
+                return
+    except FileNotFoundError:
+        pass
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(data)
+
+
+def asset_urls(manifest) -> dict:
+    """Maps the URL of every fingerprinted asset to its fingerprinted URL."""
+    return {"/" + rel_path.replace(os.sep, "/"): "/" + entry[2].replace(os.sep, "/")
+            for rel_path, entry in manifest.fingerprints.items()}
 
 
 
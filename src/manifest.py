@@ -0,0 +1,169 @@
+import hashlib, json, os
+
+MANIFEST_VERSION = 4
+HASH_CHUNK_SIZE = 1 << 16
+
+
+def hash_bytes(data) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DependencyGraph:
+    """Which input files each generated page was built from.
+
+    `edges` maps a page's source to {dependency path: [mtime_ns, size, hash]}
+    for its template and the static assets it references. A page is stale when
+    any dependency is missing or its content changed; a dependency whose size
+    and mtime still match is trusted without being read.
+    """
+
+    def __init__(self, edges=None):
+        self.edges = edges if edges is not None else {}
+        self._hashes = {}
+
+    def _signature(self, path):
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        # Pages share templates and assets, so each version of a file is hashed once.
+        if key not in self._hashes:
+            self._hashes[key] = hash_file(path)
+        return [stat.st_mtime_ns, stat.st_size, self._hashes[key]]
+
+    def record(self, page, dependencies):
+        self.edges[page] = {os.path.normpath(path): self._signature(path) for path in dependencies}
+
+    def remove(self, page):
+        self.edges.pop(page, None)
+
+    def is_stale(self, page) -> bool:
+        dependencies = self.edges.get(page)
+        if dependencies is None:
+            return True
+
+        for path, (mtime_ns, size, digest) in dependencies.items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return True
+            if stat.st_mtime_ns == mtime_ns and stat.st_size == size:
+                continue
+            if stat.st_size != size or self._signature(path)[2] != digest:
+                return True
+        return False
+
+    def dependents(self, paths) -> set:
+        """Returns the pages that depend on any of `paths`."""
+        paths = {os.path.normpath(path) for path in paths}
+        return {page for page, dependencies in self.edges.items() if not paths.isdisjoint(dependencies)}
+
+
+class BuildManifest:
+    """Persisted record of the inputs and output of every generated page.
+
+    Each entry is keyed by the source markdown path and stores the source hash,
+    the template hash, the hash, size and mtime of the written output and the
+    page's link and image targets. A page whose entry still matches is skipped
+    by the build, and its links are still known to the link checker. `assets`
+    lists the static files synced into the output, so ones deleted from static/
+    can be removed again, and `fingerprints` maps each one written under a
+    fingerprinted name to [mtime_ns, size, output path]. `graph` records what
+    else each page depends on.
+    """
+
+    def __init__(self, path, pages=None, assets=None, dependencies=None, fingerprints=None):
+        self.path = path
+        self.pages = pages if pages is not None else {}
+        self.assets = assets if assets is not None else []
+        self.fingerprints = fingerprints if fingerprints is not None else {}
+        self.graph = DependencyGraph(dependencies)
+        self._template_hashes = {}
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+
+        if data.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        return cls(path, data.get("pages", {}), data.get("assets", []), data.get("dependencies", {}),
+                   data.get("fingerprints", {}))
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "pages": self.pages, "assets": self.assets,
+                       "dependencies": self.graph.edges, "fingerprints": self.fingerprints}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def template_hash(self, template_path) -> str:
+        # Memoized per mtime so a long-running watch process notices template edits.
+        mtime_ns = os.stat(template_path).st_mtime_ns
+        cached = self._template_hashes.get(template_path)
+        if cached is None or cached[0] != mtime_ns:
+            cached = (mtime_ns, hash_file(template_path))
+            self._template_hashes[template_path] = cached
+        return cached[1]
+
+    def is_fresh(self, source, source_hash, template_hash, dest_path) -> bool:
+        entry = self.pages.get(source)
+        if entry is None:
+            return False
+        if (entry["source"] != source_hash
+                or entry["template"] != template_hash
+                or entry["dest"] != str(dest_path)):
+            return False
+
+        try:
+            stat = os.stat(dest_path)
+        except OSError:
+            return False
+
+        # Only re-hash the output when it looks like it was touched since we wrote it.
+        if stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]:
+            return True
+        return stat.st_size == entry["size"] and hash_file(dest_path) == entry["output"]
+
+    def record(self, source, source_hash, template_hash, dest_path, output_hash, links=()):
+        stat = os.stat(dest_path)
+        self.pages[source] = {
+            "source": source_hash,
+            "template": template_hash,
+            "dest": str(dest_path),
+            "output": output_hash,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "links": [list(link) for link in links],
+        }
+
+    def remove_stale(self, sources) -> list:
+        """Deletes outputs of pages whose source is no longer in `sources`."""
+        sources = set(sources)
+        removed = []
+
+        for source in sorted(self.pages):
+            if source in sources:
+                continue
+            dest_path = self.pages.pop(source)["dest"]
+            self.graph.remove(source)
+            try:
+                os.remove(dest_path)
+            except FileNotFoundError:
+                pass
+            removed.append(dest_path)
+
+        return removed
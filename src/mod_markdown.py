@@ -1,6 +1,35 @@
 import re
+from collections import OrderedDict
 from textnode import TextNode, TextType
-from htmlnode import LeafNode, ParentNode
+from htmlnode import LeafNode, ParentNode, RawNode
+
+# Links and images are found first, as the split passes did, so a delimiter
+# pair never swallows one; delimiters are then paired only within the text
+# between them. At a given position bold wins over italic.
+LINK_PATTERN = re.compile(
+    r"!\[(?P<image_alt>[^\[\]]*)\]\((?P<image_url>[^\(\)]*)\)"
+    r"|(?<!!)\[(?P<link_text>[^\[\]]*)\]\((?P<link_url>[^\(\)]*)\)"
+)
+DELIMITER_PATTERN = re.compile(
+    r"\*\*(?P<bold>.*?)\*\*"
+    r"|\*(?P<italic>.*?)\*"
+    r"|`(?P<code>.*?)`"
+    r"|>(?P<quote>.*?)>",
+    re.DOTALL,
+)
+
+HEADING_PATTERN = re.compile(r"(#{1,6})\s")
+CODE_FENCE_END_PATTERN = re.compile(r"```$", re.MULTILINE)
+QUOTE_PATTERN = re.compile(r">\s")
+UNORDERED_ITEM_PATTERN = re.compile(r"[*+-]\s")
+ORDERED_ITEM_PATTERN = re.compile(r"(\d+)\.\s")
+
+INLINE_TYPES = {
+    "bold": TextType.BOLD,
+    "italic": TextType.ITALIC,
+    "code": TextType.CODE,
+    "quote": TextType.QUOTE,
+}
 
 def extract_title(markdown):
     pattern = re.match(r"^\#{1}\s.*", markdown)
@@ -11,7 +40,52 @@ def extract_title(markdown):
         raise Exception("No valid heading found.")
 
 
-def markdown_to_html_node(markdown):
+class BlockCache:
+    """LRU of rendered block HTML, keyed by the block's markdown.
+
+    Sites repeat the same blocks (disclaimers, link lists, code samples) across
+    many pages; a hit skips classification, inline parsing and serialization.
+    Blocks over `max_block_length` characters are rendered without caching.
+    Each entry also keeps the block's link and image targets and its text runs,
+    so a hit can still report them (see text_to_children). Like `minify`,
+    `asset_urls` is fixed for the cache's lifetime.
+    """
+
+    def __init__(self, max_entries=4096, max_block_length=64 * 1024, minify=False, asset_urls=None):
+        self.max_entries = max_entries
+        self.max_block_length = max_block_length
+        self.minify = minify
+        self.asset_urls = asset_urls
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def render(self, block, links=None, texts=None) -> RawNode:
+        entry = self._entries.get(block)
+        if entry is not None:
+            self._entries.move_to_end(block)
+            self.hits += 1
+            html, block_links, block_texts = entry
+        else:
+            self.misses += 1
+            block_links, block_texts = [], []
+            html = block_to_html_node(block, block_links, block_texts, self.asset_urls).to_html(self.minify)
+            if len(block) <= self.max_block_length:
+                self._entries[block] = (html, tuple(block_links), tuple(block_texts))
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        if links is not None:
+            links.extend(block_links)
+        if texts is not None:
+            texts.extend(block_texts)
+        return RawNode(html)
+
+
+def markdown_to_html_node(markdown, block_cache=None, links=None, texts=None, asset_urls=None):
     if type(markdown) != str:
         raise TypeError("Provided markdown format is invalid.")
     # converts full md document to a single html node
@@ -22,98 +96,65 @@ def markdown_to_html_node(markdown):
     blocks = markdown_to_blocks(markdown)
 
     for block in blocks:
-        block_type = block_to_block_type(block)
-
-        if block_type == "heading":
-            header_tag = count_header_symbols(block)
-            text = block.lstrip("# ").rstrip()
-            children = text_to_children(text)
-            
-            header_node = ParentNode(tag=header_tag, children=children)
-            child_nodes.append(header_node)
-
-        elif block_type == "code":
-            text = block.strip("`")
-            children = text_to_children(text)
-            code_node = ParentNode(tag="code", children=children)
-            pre_node = ParentNode(tag="pre", children=[code_node])
-            child_nodes.append(pre_node)
-
-        elif block_type == "quote":
-            text = block.strip("> ")
-            children = text_to_children(text)
-            quote_node = ParentNode(tag="blockquote", children=children) #props: {"cite": "url"}
-            child_nodes.append(quote_node)
-        
-        elif block_type == "unordered list":
-            lines = block.splitlines()
-
-            children = []
-            for line in lines:
-                if line.startswith("* ") or line.startswith("- ") or line.startswith("+ "):
-                    text = line[2:]
-                    inline_children = text_to_children(text)
-                    children.append(ParentNode(tag="li", children=inline_children))
-                
-            ul_node = ParentNode(tag="ul", children=children)
-            child_nodes.append(ul_node)
-
-        elif block_type == "ordered list":
-            lines = block.splitlines()
-            children = []
-
-            for line in lines:
-                if re.match(r"\d\.\s", line):
-                    period_pos = line.find(".")
-                    text_start = period_pos + 2
-                    text = line[text_start:]
-                    inline_children = text_to_children(text)
-                    children.append(ParentNode(tag="li", children=inline_children))
-                
-            ol_node = ParentNode(tag="ol", children=children)
-            child_nodes.append(ol_node)
-
-        elif block_type == "paragraph":
-            children = text_to_children(block)
-            p_node = ParentNode(tag="p", children=children)
-            child_nodes.append(p_node)
+        if block_cache is not None:
+            child_nodes.append(block_cache.render(block, links, texts))
+        else:
+            child_nodes.append(block_to_html_node(block, links, texts, asset_urls))
 
     return html_node
 
-def text_to_children(text):
+def block_to_html_node(block, links=None, texts=None, asset_urls=None):
+    block_type, items, level = classify_block(block)
+
+    if block_type == "heading":
+        children = text_to_children(items[0], links, texts, level, asset_urls)
+        return ParentNode(tag=f"h{level}", children=children)
+
+    elif block_type == "code":
+        children = text_to_children(items[0], links, asset_urls=asset_urls)
+        code_node = ParentNode(tag="code", children=children)
+        return ParentNode(tag="pre", children=[code_node])
+
+    elif block_type == "quote":
+        children = text_to_children(items[0], links, texts, asset_urls=asset_urls)
+        return ParentNode(tag="blockquote", children=children) #props: {"cite": "url"}
+
+    elif block_type == "unordered list" or block_type == "ordered list":
+        children = []
+        for text in items:
+            children.append(ParentNode(tag="li", children=text_to_children(text, links, texts, asset_urls=asset_urls)))
+
+        list_tag = "ul" if block_type == "unordered list" else "ol"
+        return ParentNode(tag=list_tag, children=children)
+
+    children = text_to_children(items[0], links, texts, asset_urls=asset_urls)
+    return ParentNode(tag="p", children=children)
+
+def text_to_children(text, links=None, texts=None, heading_level=0, asset_urls=None):
+    """Converts inline markdown to LeafNodes.
+
+    When a `links` list is given, a ("link", url) or ("image", url) pair is
+    appended to it for every link and image, in document order. When a `texts`
+    list is given, the readable text of every node (image alt text included) is
+    appended to it as a (text, heading_level) pair, for the search index.
+    Image sources and link targets are rewritten through `asset_urls` (see
+    text_node_to_html_node); `links` keeps the targets as written.
+    """
     text_nodes = text_to_textnodes(text)
 
     children = []
     for text_node in text_nodes:
-        children.append(text_node_to_html_node(text_node))
+        if links is not None and text_node.text_type in (TextType.LINK, TextType.IMAGE):
+            links.append((text_node.text_type.name.lower(), text_node.url))
+        if texts is not None and text_node.text:
+            texts.append((text_node.text, heading_level))
+        children.append(text_node_to_html_node(text_node, asset_urls))
     
     return children
 
-def count_header_symbols(block):
-    count = 0
-    header_tag = ""
-
-    for char in block:
-        if char == "#":
-            count += 1
-    if count > 6:
-        return ""
-    elif count == 1:
-        header_tag = "h1"
-    elif count == 2:
-        header_tag = "h2"
-    elif count == 3:
-        header_tag = "h3"
-    elif count == 4:
-        header_tag = "h4"
-    elif count == 5:
-        header_tag = "h5"
-    else:
-        header_tag = "h6"
-    
-    return header_tag
-
-def text_node_to_html_node(text_node) -> LeafNode:
+def text_node_to_html_node(text_node, asset_urls=None) -> LeafNode:
+    # `asset_urls` maps static asset URLs to their fingerprinted URLs; image
+    # sources and link targets naming one are rewritten.
 
     if not isinstance(text_node.text_type, TextType):
         raise TypeError("Invalid text type")
@@ -123,9 +164,11 @@ def text_node_to_html_node(text_node) -> LeafNode:
     tag_value = text_node.text_type.value
 
     if text_node.text_type == TextType.IMAGE:
-        text_node = LeafNode(tag=tag_value, value=" ", props={"src": text_node.url, "alt": text_node.text})
+        src = asset_urls.get(text_node.url, text_node.url) if asset_urls else text_node.url
+        text_node = LeafNode(tag=tag_value, value=" ", props={"src": src, "alt": text_node.text})
     elif text_node.text_type == TextType.LINK:
-        text_node = LeafNode(tag=tag_value, value=text_node.text, props={"href": text_node.url})
+        href = asset_urls.get(text_node.url, text_node.url) if asset_urls else text_node.url
+        text_node = LeafNode(tag=tag_value, value=text_node.text, props={"href": href})
     else:
         text_node = LeafNode(tag=tag_value, value=text_node.text)
     return text_node
@@ -224,24 +267,47 @@ def split_nodes_link(old_nodes):
 
 
 def text_to_textnodes(text):
+    """Tokenizes a run of inline markdown into TextNodes.
+
+    Links and images take priority: `*[home](/)*` is a link between two literal
+    asterisks, not an italic span.
+
+    Args:
+        text (str): inline markdown, e.g. the contents of a paragraph
+
+    Returns:
+        lst([TextNode]): plain text, bold, italic, code, link and image nodes in
+        document order. Empty plain text runs are not emitted.
+    """
     if text == "" or type(text) != str:
         return []
 
-    old_nodes = [TextNode(text, TextType.TEXT)]
+    nodes = []
+    position = 0
+
+    for match in LINK_PATTERN.finditer(text):
+        _split_delimiters(text, position, match.start(), nodes)
+        if match.lastgroup == "image_url":
+            nodes.append(TextNode(match.group("image_alt"), TextType.IMAGE, match.group("image_url")))
+        else:
+            nodes.append(TextNode(match.group("link_text"), TextType.LINK, match.group("link_url")))
+        position = match.end()
+
+    _split_delimiters(text, position, len(text), nodes)
+    return nodes
 
-    delimiter_map = {
-        '**': TextType.BOLD,
-        '*': TextType.ITALIC,
-        '`': TextType.CODE,
-        '>': TextType.QUOTE,
-    }
 
-    for delimiter, text_type in delimiter_map.items():
-            old_nodes = split_nodes_delimiter(old_nodes, delimiter, text_type)
-            old_nodes = split_nodes_image(old_nodes)
-            old_nodes = split_nodes_link(old_nodes)
+def _split_delimiters(text, start, end, nodes):
+    # Appends the plain, bold, italic, code and quote nodes of text[start:end].
+    position = start
+    for match in DELIMITER_PATTERN.finditer(text, start, end):
+        if match.start() > position:
+            nodes.append(TextNode(text[position:match.start()], TextType.TEXT))
+        nodes.append(TextNode(match.group(match.lastgroup), INLINE_TYPES[match.lastgroup]))
+        position = match.end()
 
-    return old_nodes
+    if position < end:
+        nodes.append(TextNode(text[position:end], TextType.TEXT))
 
 
 def extract_markdown_images(text):
@@ -264,39 +330,84 @@ def markdown_to_blocks(markdown):
     return blocks
 
 
+def iter_blocks(lines):
+    """Lazily yields the same blocks as markdown_to_blocks from an iterable of lines.
+
+    Only the lines of the current block are held, so a file object can be passed
+    in directly to parse documents larger than memory.
+    """
+    block_lines = []
+
+    for line in lines:
+        if line.strip():
+            block_lines.append(line)
+        elif block_lines:
+            yield "".join(block_lines).strip()
+            block_lines = []
+
+    if block_lines:
+        yield "".join(block_lines).strip()
+
+
+def write_markdown_html(lines, stream, block_cache=None, minify=False, links=None, texts=None, asset_urls=None):
+    """Converts markdown lines to HTML block by block, writing each to `stream`.
+
+    Produces the same output as markdown_to_html_node(markdown).to_html()
+    without building the document's tree.
+    """
+    stream.write("<div>")
+    for block in iter_blocks(lines):
+        if block_cache is not None:
+            block_cache.render(block, links, texts).write_html(stream, minify)
+        else:
+            block_to_html_node(block, links, texts, asset_urls).write_html(stream, minify)
+    stream.write("</div>")
+
+
 def block_to_block_type(block):
-    heading = re.match(r"^\#{1,6}\s.*$", block, re.MULTILINE)
-    code = re.match(r"^(?:`{3})[\s\S]*?(?:`{3})$", block, re.MULTILINE)
-    quote = re.match(r"^>\s.*$", block, re.MULTILINE)
+    return classify_block(block)[0]
 
-    unordered_pattern = r"^(\*|-|\+)\s.*$"
-    unordered_list = re.findall(unordered_pattern, block, re.MULTILINE)
 
-    ordered_pattern = r"^\d+\.\s.*$"
-    ordered_list = re.findall(ordered_pattern, block, re.MULTILINE)
-    expected_number = 1
+def classify_block(block):
+    """Classifies a block and splits out its content in a single scan.
+
+    Args:
+        block (str): one block as returned by markdown_to_blocks
+
+    Returns:
+        tuple(str, lst([str]), int): the block type, the inline text of each
+        item (one entry per list item, otherwise a single entry) and the
+        heading level, which is 0 for anything but headings.
+    """
+    if block.startswith("#"):
+        match = HEADING_PATTERN.match(block)
+        if match:
+            return "heading", [block.lstrip("# ").rstrip()], len(match.group(1))
+
+    if block.startswith("```") and CODE_FENCE_END_PATTERN.search(block, 3):
+        return "code", [block.strip("`")], 0
+
+    if QUOTE_PATTERN.match(block):
+        return "quote", [block.strip("> ")], 0
+
+    unordered_items = []
+    ordered_items = []
     sequence_broken = False
 
-    if heading: 
-        return "heading"
-    elif code:
-        return "code"
-    elif quote:
-        return "quote"
-    elif unordered_list:
-        return "unordered list"
-    elif ordered_list:
-        for item in ordered_list:
-            match = re.match(r"^(\d+)\.", item.strip())
-
-            if match:
-                number = int(match.group(1))
-
-                if number != expected_number:
-                    sequence_broken = True
-                expected_number += 1
-
-        if not sequence_broken:  
-            return "ordered list"
-    
-    return "paragraph"
+    for line in block.splitlines():
+        if UNORDERED_ITEM_PATTERN.match(line):
+            unordered_items.append(line[2:])
+            continue
+
+        match = ORDERED_ITEM_PATTERN.match(line)
+        if match:
+            if int(match.group(1)) != len(ordered_items) + 1:
+                sequence_broken = True
+            ordered_items.append(line[match.end():])
+
+    if unordered_items:
+        return "unordered list", unordered_items, 0
+    elif ordered_items and not sequence_broken:
+        return "ordered list", ordered_items, 0
+
+    return "paragraph", [block], 0
@@ -0,0 +1,156 @@
+import os, posixpath, threading
+from collections import OrderedDict
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+from discovery import is_ignored
+
+
+class PageCache:
+    """Thread-safe LRU of rendered pages, bounded by the total size of their bodies.
+
+    Each entry remembers the mtime of every file it was rendered from (the
+    source and its template); get() returns None once any of them changed.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        # Stat outside the lock so one slow filesystem call doesn't stall every request.
+        if entry is not None and entry[0] == _mtimes(path for path, _ in entry[0]):
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                self.hits += 1
+            return entry[1]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, body, dependencies):
+        mtimes = _mtimes(dependencies)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old[1])
+            if len(body) > self.max_bytes:
+                return
+            self._entries[key] = (mtimes, body)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+def _mtimes(paths) -> list:
+    mtimes = []
+    for path in paths:
+        try:
+            mtimes.append((path, os.stat(path).st_mtime_ns))
+        except OSError:
+            mtimes.append((path, None))
+    return mtimes
+
+
+def content_path(url_path, content_dir):
+    """Maps a request path to the markdown file that renders it, or None.
+
+    "/" and "/blog/" map to index.md in that directory and "/blog/post.html"
+    to blog/post.md, mirroring where the build writes each page.
+    """
+    path = posixpath.normpath(unquote(url_path))
+    parts = [part for part in path.split("/") if part]
+    if any(is_ignored(part) for part in parts):
+        return None
+
+    if url_path.endswith("/") or not parts:
+        rel_path = os.path.join(*parts, "index.md")
+    elif parts[-1].endswith(".html"):
+        rel_path = os.path.join(*parts[:-1], parts[-1][:-len(".html")] + ".md")
+    else:
+        return None
+
+    from_path = os.path.join(content_dir, rel_path)
+    return from_path if os.path.isfile(from_path) else None
+
+
+class OnDemandHandler(SimpleHTTPRequestHandler):
+    """Renders content pages when first requested and serves static files as they are.
+
+    `render(from_path)` returns (html, dependency paths); results are kept in
+    `page_cache` until one of those files changes.
+    """
+
+    def __init__(self, *args, content_dir=None, render=None, page_cache=None, **kwargs):
+        self.content_dir = content_dir
+        self.render = render
+        self.page_cache = page_cache
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        if not self.send_page():
+            super().do_GET()
+
+    def do_HEAD(self):
+        if not self.send_page(head_only=True):
+            super().do_HEAD()
+
+    def send_page(self, head_only=False) -> bool:
+        url_path = self.path.split("?", 1)[0].split("#", 1)[0]
+        if any(is_ignored(part) for part in unquote(url_path).split("/") if part):
+            self.send_error(404, "File not found")
+            return True
+
+        from_path = content_path(url_path, self.content_dir)
+        if from_path is None:
+            # "/blog" has to become "/blog/" for relative links on the page to resolve.
+            if not url_path.endswith("/") and content_path(url_path + "/", self.content_dir) is not None:
+                self.send_response(301)
+                self.send_header("Location", url_path + "/")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return True
+            return False
+
+        body = self.page_cache.get(from_path)
+        if body is None:
+            try:
+                html, dependencies = self.render(from_path)
+            except Exception as err:
+                self.send_error(500, f"Failed to render {from_path}: {err!r}")
+                return True
+            body = html.encode("utf-8")
+            self.page_cache.put(from_path, body, dependencies)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if not head_only:
+            self.wfile.write(body)
+        return True
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_on_demand_server(content_dir, static_dir, port, render, page_cache):
+    """Returns a threaded HTTP server that renders `content_dir` on demand; call serve_forever() on it."""
+    handler = partial(OnDemandHandler, directory=static_dir, content_dir=content_dir, render=render,
+                      page_cache=page_cache)
+    server = ThreadingHTTPServer(("", port), handler)
+    server.daemon_threads = True
+    return server
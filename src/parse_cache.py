@@ -0,0 +1,87 @@
+import json, os, shutil, zlib
+import htmlnode, mod_markdown, textnode
+from manifest import hash_bytes, hash_file
+
+_parser_version = None
+
+
+def parser_version() -> str:
+    """Hash of the parser and node modules; any edit to them invalidates the cache."""
+    global _parser_version
+    if _parser_version is None:
+        hashes = [hash_file(module.__file__) for module in (mod_markdown, htmlnode, textnode)]
+        _parser_version = hash_bytes(":".join(hashes).encode("utf-8"))[:16]
+    return _parser_version
+
+
+class ParseCache:
+    """On-disk cache of rendered page bodies keyed by source hash and parser version.
+
+    Entries are the zlib-compressed HTML and link targets of a body, stored
+    under `directory/<parser version>/`. Reading
+    an entry bumps its mtime, and evict() drops entries of older parser versions
+    and then the least recently used ones until the cache fits in `max_bytes`.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.version_directory = os.path.join(directory, parser_version())
+
+    def _entry_path(self, source_hash):
+        return os.path.join(self.version_directory, source_hash[:2], f"{source_hash}.z")
+
+    def get(self, source_hash):
+        entry = self.get_entry(source_hash)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, source_hash):
+        """Returns the cached (html, links) for `source_hash`, or None."""
+        path = self._entry_path(source_hash)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+            html, links = json.loads(zlib.decompress(data))
+        except (OSError, zlib.error, ValueError):
+            return None
+        return html, [tuple(link) for link in links]
+
+    def put(self, source_hash, html, links=()):
+        path = self._entry_path(source_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Written under a unique name and renamed so concurrent workers never see a partial entry.
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(zlib.compress(json.dumps([html, list(links)]).encode("utf-8"), 6))
+        os.replace(tmp_path, path)
+
+    def evict(self) -> int:
+        """Trims the cache to max_bytes and returns the number of entries removed."""
+        removed = 0
+        if not os.path.isdir(self.directory):
+            return removed
+
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if path != self.version_directory:
+                removed += sum(len(filenames) for _, _, filenames in os.walk(path))
+                shutil.rmtree(path)
+
+        entries = []
+        for root, _, filenames in os.walk(self.version_directory):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+
+        return removed
@@ -0,0 +1,101 @@
+import asyncio, os
+from concurrent.futures import ThreadPoolExecutor
+
+_DONE = object()
+
+
+class _Failed:
+    __slots__ = ("error",)
+
+    def __init__(self, error):
+        self.error = error
+
+
+async def _run_pipeline(items, read, render, write, destination, render_executor, render_workers, io_threads,
+                        queue_size):
+    loop = asyncio.get_running_loop()
+    read_queue = asyncio.Queue(queue_size)
+    write_queue = asyncio.Queue(queue_size)
+    outcomes = [None] * len(items)
+    directories = {}
+
+    with ThreadPoolExecutor(max_workers=io_threads) as io_executor:
+
+        async def make_directory(directory):
+            # Each directory is created once; writers for the same directory wait on it.
+            if directory not in directories:
+                directories[directory] = loop.run_in_executor(io_executor, lambda: os.makedirs(directory, exist_ok=True))
+            await directories[directory]
+
+        async def reader(indexes):
+            for index in indexes:
+                try:
+                    data = await loop.run_in_executor(io_executor, read, items[index])
+                except Exception as err:
+                    data = _Failed(err)
+                await read_queue.put((index, data))
+
+        async def renderer():
+            while True:
+                entry = await read_queue.get()
+                if entry is _DONE:
+                    return
+                index, data = entry
+                if not isinstance(data, _Failed):
+                    try:
+                        data = await loop.run_in_executor(render_executor, render, items[index], data)
+                    except Exception as err:
+                        data = _Failed(err)
+                await write_queue.put((index, data))
+
+        async def writer():
+            while True:
+                entry = await write_queue.get()
+                if entry is _DONE:
+                    return
+                index, data = entry
+                if isinstance(data, _Failed):
+                    outcomes[index] = data
+                    continue
+                try:
+                    directory = os.path.dirname(destination(items[index]))
+                    if directory:
+                        await make_directory(directory)
+                    outcomes[index] = await loop.run_in_executor(io_executor, write, items[index], data)
+                except Exception as err:
+                    outcomes[index] = _Failed(err)
+
+        reader_count = max(1, io_threads // 2)
+        readers = [asyncio.create_task(reader(range(start, len(items), reader_count))) for start in range(reader_count)]
+        renderers = [asyncio.create_task(renderer()) for _ in range(max(1, render_workers))]
+        writers = [asyncio.create_task(writer()) for _ in range(max(1, io_threads // 2))]
+
+        await asyncio.gather(*readers)
+        for _ in renderers:
+            await read_queue.put(_DONE)
+        await asyncio.gather(*renderers)
+        for _ in writers:
+            await write_queue.put(_DONE)
+        await asyncio.gather(*writers)
+
+    return outcomes
+
+
+def run_pipeline(items, read, render, write, destination, render_executor, render_workers=1, io_threads=8,
+                 queue_size=64):
+    """Runs read -> render -> write over `items` with the stages overlapping.
+
+    `read(item)` and `write(item, rendered)` run on a thread pool of
+    `io_threads`, so slow storage doesn't leave the CPU idle. `render(item, data)`
+    runs on `render_executor` with up to `render_workers` pages in flight. The
+    stages are connected by queues of `queue_size` items, which bounds how many
+    sources and rendered pages are held in memory at once. `destination(item)`
+    gives the output path, whose directory is created once before the first
+    write into it.
+
+    Returns a list, in item order, of (write result, None) or (None, exception)
+    for whichever stage failed for that item.
+    """
+    outcomes = asyncio.run(_run_pipeline(items, read, render, write, destination, render_executor, render_workers,
+                                         io_threads, queue_size))
+    return [(None, outcome.error) if isinstance(outcome, _Failed) else (outcome, None) for outcome in outcomes]
@@ -0,0 +1,180 @@
+import json, os, sys, threading, time, tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def count_nodes(node) -> int:
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if node.children:
+            stack.extend(node.children)
+    return count
+
+
+def peak_rss(who="self") -> int:
+    """Peak resident set size in bytes of this process ("self") or of its largest
+    terminated child ("children"); 0 where the resource module is unavailable."""
+    if resource is None:
+        return 0
+    usage = resource.getrusage(resource.RUSAGE_SELF if who == "self" else resource.RUSAGE_CHILDREN)
+    # ru_maxrss is in kilobytes, except on macOS where it is in bytes.
+    return usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+
+
+class PageProfile:
+    """Wall and CPU time of each stage of building one page.
+
+    With `memory_sites`, allocations are traced with tracemalloc from the start
+    of the page: the report keeps the page's peak traced memory, the process's
+    peak RSS when it finished, and the `memory_sites` source lines holding the
+    most memory at the end of the stage where the page used the most.
+    """
+
+    def __init__(self, page, memory_sites=0):
+        self.page = page
+        self.stages = []
+        self.counts = {}
+        self.memory_sites = memory_sites
+        self._memory_high = -1
+        self._snapshot = None
+        if memory_sites:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            # Forget earlier pages, so current and peak only count this one.
+            tracemalloc.clear_traces()
+
+    @contextmanager
+    def stage(self, name):
+        start_us = time.time_ns() // 1000
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            self.stages.append({
+                "name": name,
+                "start_us": start_us,
+                "wall": time.perf_counter() - wall,
+                "cpu": time.process_time() - cpu,
+            })
+            if self.memory_sites:
+                current, _ = tracemalloc.get_traced_memory()
+                if current > self._memory_high:
+                    self._memory_high = current
+                    self._snapshot = tracemalloc.take_snapshot()
+
+    def memory(self) -> dict:
+        _, peak = tracemalloc.get_traced_memory()
+        sites = []
+        if self._snapshot is not None:
+            snapshot = self._snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+            for stat in snapshot.statistics("lineno")[:self.memory_sites]:
+                frame = stat.traceback[0]
+                sites.append([f"{frame.filename}:{frame.lineno}", stat.size, stat.count])
+        return {"peak": peak, "rss": peak_rss(), "sites": sites}
+
+    def to_dict(self) -> dict:
+        data = {
+            "page": self.page,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "stages": self.stages,
+            "counts": self.counts,
+        }
+        if self.memory_sites:
+            data["memory"] = self.memory()
+        return data
+
+
+class NullProfile:
+    """Stand-in used when profiling is off, so generate_page has a single code path."""
+
+    counts = {}
+
+    @contextmanager
+    def stage(self, name):
+        yield
+
+    def to_dict(self):
+        return None
+
+
+class BuildProfiler:
+    """Collects page profiles from every worker and writes the reports."""
+
+    def __init__(self):
+        self.pages = []
+
+    def add(self, page_profile):
+        if page_profile is not None:
+            self.pages.append(page_profile)
+
+    def stage_totals(self) -> dict:
+        totals = {}
+        for page in self.pages:
+            for stage in page["stages"]:
+                wall, cpu = totals.get(stage["name"], (0.0, 0.0))
+                totals[stage["name"]] = (wall + stage["wall"], cpu + stage["cpu"])
+        return totals
+
+    def slowest_pages(self, limit=10) -> list:
+        def page_wall(page):
+            return sum(stage["wall"] for stage in page["stages"])
+        return [(page["page"], page_wall(page)) for page in sorted(self.pages, key=page_wall, reverse=True)[:limit]]
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"pages": self.pages, "stages": self.stage_totals()}, f, indent=1)
+
+    def write_trace(self, path):
+        """Writes a Chrome trace-event file (open in chrome://tracing or Perfetto)."""
+        events = []
+        for page in self.pages:
+            for stage in page["stages"]:
+                events.append({
+                    "name": stage["name"],
+                    "cat": "page",
+                    "ph": "X",
+                    "ts": stage["start_us"],
+                    "dur": stage["wall"] * 1e6,
+                    "pid": page["pid"],
+                    "tid": page["tid"],
+                    "args": {"page": page["page"], "cpu_ms": stage["cpu"] * 1000},
+                })
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def memory_summary(self, limit=10) -> str:
+        pages = sorted((page for page in self.pages if "memory" in page), key=lambda page: page["memory"]["peak"],
+                       reverse=True)
+        worker_rss = max((page["memory"]["rss"] for page in pages), default=0)
+        worker_rss = max(worker_rss, peak_rss("children"))
+        lines = [f"Peak RSS: {_format_size(peak_rss())} this process, {_format_size(worker_rss)} largest worker"]
+        lines.append(f"Largest {min(limit, len(pages))} page(s) by traced peak:")
+        for page in pages[:limit]:
+            lines.append(f"  {_format_size(page['memory']['peak'])}  {page['page']}")
+            for site, size, count in page["memory"]["sites"]:
+                lines.append(f"      {_format_size(size)}  {site} ({count} blocks)")
+        return "\n".join(lines)
+
+    def summary(self, limit=10) -> str:
+        lines = ["Stage totals (wall / cpu):"]
+        for name, (wall, cpu) in sorted(self.stage_totals().items(), key=lambda item: item[1][0], reverse=True):
+            lines.append(f"  {name:<14} {wall * 1000:10.1f} ms {cpu * 1000:10.1f} ms")
+        lines.append(f"Slowest {min(limit, len(self.pages))} page(s):")
+        for page, wall in self.slowest_pages(limit):
+            lines.append(f"  {wall * 1000:10.1f} ms  {page}")
+        return "\n".join(lines)
+
+
+def _format_size(size) -> str:
+    if size < 1024 * 1024:
+        return f"{size / 1024:8.1f} KiB"
+    return f"{size / (1024 * 1024):8.1f} MiB"
@@ -0,0 +1,155 @@
+import json, os, re, shutil
+from parse_cache import parser_version
+
+SEARCH_FORMAT_VERSION = 1
+TERM_PATTERN = re.compile(r"\w+")
+MIN_TERM_LENGTH = 2
+HEADING_WEIGHT = 5
+
+
+def tokenize(text) -> list:
+    """Splits text into lowercase search terms."""
+    return [term for term in TERM_PATTERN.findall(text.lower()) if len(term) >= MIN_TERM_LENGTH]
+
+
+def page_entry(texts) -> dict:
+    """Builds a page's search entry from the (text, heading_level) runs of its body.
+
+    Returns:
+        dict: "title", the text of the leading h1, and "postings", mapping each
+        term to [weight, [positions]]. A term scores 1 per occurrence in body
+        text and HEADING_WEIGHT per occurrence in a heading.
+    """
+    title = []
+    for text, level in texts:
+        if level != 1:
+            break
+        title.append(text)
+
+    postings = {}
+    position = 0
+    for text, level in texts:
+        weight = HEADING_WEIGHT if level else 1
+        for term in tokenize(text):
+            posting = postings.setdefault(term, [0, []])
+            posting[0] += weight
+            posting[1].append(position)
+            position += 1
+
+    return {"title": "".join(title).strip(), "postings": postings}
+
+
+class SearchStore:
+    """On-disk search entries of built pages, keyed by source hash.
+
+    Pages skipped by an incremental build keep their entry, so the index can be
+    rebuilt without parsing them again. Entries live under a directory named
+    for the parser version and the format, and prune() drops everything else.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.version_directory = os.path.join(directory, f"{parser_version()}-{SEARCH_FORMAT_VERSION}")
+
+    def _entry_path(self, source_hash):
+        return os.path.join(self.version_directory, source_hash[:2], f"{source_hash}.json")
+
+    def has(self, source_hash) -> bool:
+        return os.path.exists(self._entry_path(source_hash))
+
+    def get(self, source_hash):
+        try:
+            with open(self._entry_path(source_hash), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, source_hash, entry):
+        path = self._entry_path(source_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def prune(self, source_hashes) -> int:
+        """Removes entries of other versions and of sources not in `source_hashes`."""
+        removed = 0
+        if not os.path.isdir(self.directory):
+            return removed
+
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if path != self.version_directory:
+                removed += sum(len(filenames) for _, _, filenames in os.walk(path))
+                shutil.rmtree(path)
+
+        keep = {f"{source_hash}.json" for source_hash in source_hashes}
+        for root, _, filenames in os.walk(self.version_directory):
+            for filename in filenames:
+                if filename not in keep:
+                    os.remove(os.path.join(root, filename))
+                    removed += 1
+        return removed
+
+
+def write_search_index(pages, directory, prefix_length=2):
+    """Writes the inverted index of `pages` as sharded JSON under `directory`.
+
+    `index.json` lists the pages as [url, title] (a page's id is its position)
+    and the shard names. Each term lives in the shard named by its first
+    `prefix_length` characters, `<shard>.json`, as
+    {term: [[page id, weight, [positions]], ...]}, so a browser only downloads
+    the shards of the terms being searched for. Files whose content didn't
+    change are left untouched, and shards that are no longer needed are removed.
+
+    Args:
+        pages (iterable(tuple(str, dict))): (url, search entry) for each page
+
+    Returns:
+        tuple(int, int): the number of files written and removed.
+    """
+    listing = []
+    shards = {}
+    for page_id, (url, entry) in enumerate(pages):
+        listing.append([url, entry["title"]])
+        for term, (weight, positions) in entry["postings"].items():
+            shards.setdefault(term[:prefix_length], {}).setdefault(term, []).append([page_id, weight, positions])
+
+    files = {f"{shard}.json": {term: shards[shard][term] for term in sorted(shards[shard])} for shard in shards}
+    files["index.json"] = {
+        "version": SEARCH_FORMAT_VERSION,
+        "prefix_length": prefix_length,
+        "pages": listing,
+        "shards": sorted(shards),
+    }
+
+    os.makedirs(directory, exist_ok=True)
+    written = 0
+    for filename, data in files.items():
+        if _write_if_changed(os.path.join(directory, filename),
+                             json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")):
+            written += 1
+
+    removed = 0
+    for filename in os.listdir(directory):
+        if filename.endswith(".json") and filename not in files:
+            os.remove(os.path.join(directory, filename))
+            removed += 1
+    return written, removed
+
+
+def _write_if_changed(path, data) -> bool:
+    # Unchanged shards keep their mtime, so precompression and caches skip them.
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
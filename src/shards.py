@@ -0,0 +1,86 @@
+import argparse, hashlib, os
+from assets import copy_asset, is_up_to_date, list_files
+from manifest import hash_file
+
+
+class ShardCollisionError(Exception):
+
+    def __init__(self, collisions):
+        self.collisions = collisions
+        lines = [f"{rel_path}: {first} and {second}" for rel_path, first, second in collisions]
+        super().__init__(f"{len(collisions)} output file(s) differ between shards:\n" + "\n".join(lines))
+
+
+def parse_shard(text):
+    """argparse type for "K/N": shard K (counting from 1) of N."""
+    index, sep, count = text.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        index = count = 0
+    if not sep or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"expected K/N with 1 <= K <= N, got {text!r}")
+    return index, count
+
+
+def shard_of(rel_path, count) -> int:
+    """Returns the shard, from 1 to `count`, that a content path belongs to.
+
+    The path is hashed with "/" separators, so every machine agrees regardless
+    of platform, worker count or which other pages exist.
+    """
+    digest = hashlib.sha256(rel_path.replace(os.sep, "/").encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def select_shard(pages, dir_path_content, index, count) -> list:
+    """Keeps the (source, destination) pairs of `pages` that belong to shard `index` of `count`."""
+    return [page for page in pages if shard_of(os.path.relpath(page[0], dir_path_content), count) == index]
+
+
+def shard_directory(root, index, count) -> str:
+    return os.path.join(root, f"{index}-of-{count}")
+
+
+def merge_shards(shard_roots, dest, hardlink=False):
+    """Combines the output trees of every shard into `dest`.
+
+    A path written by more than one shard must have the same content in each
+    (static assets are copied by every shard); otherwise nothing is written and
+    a ShardCollisionError lists the conflicts. Files already up to date in
+    `dest` are skipped, and files no shard produced are removed from it.
+
+    Returns:
+        tuple(lst([str]), lst([str])): the relative paths copied and removed.
+    """
+    files = {}
+    collisions = []
+    for root in shard_roots:
+        if not os.path.isdir(root):
+            raise FileNotFoundError(f"Missing shard output {root}")
+
+        for rel_path, stat in list_files(root).items():
+            if rel_path not in files:
+                files[rel_path] = (root, stat)
+                continue
+            other_root, other_stat = files[rel_path]
+            if (other_stat.st_size != stat.st_size
+                    or hash_file(os.path.join(other_root, rel_path)) != hash_file(os.path.join(root, rel_path))):
+                collisions.append((rel_path, other_root, root))
+
+    if collisions:
+        raise ShardCollisionError(collisions)
+
+    copied = []
+    for rel_path, (root, stat) in sorted(files.items()):
+        if not is_up_to_date(os.path.join(root, rel_path), stat, os.path.join(dest, rel_path)):
+            copy_asset(os.path.join(root, rel_path), os.path.join(dest, rel_path), hardlink)
+            copied.append(rel_path)
+
+    removed = []
+    if os.path.isdir(dest):
+        removed = sorted(set(list_files(dest)) - files.keys())
+        for rel_path in removed:
+            os.remove(os.path.join(dest, rel_path))
+
+    return copied, removed
@@ -0,0 +1,109 @@
+import os, re
+from htmlnode import minify_html
+
+SLOT_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+ID_PATTERN = re.compile(r"""\sid=["']?([^"'\s>]+)""")
+URL_ATTRIBUTE_PATTERN = re.compile(r"""(\s(?:href|src)=)(["']?)([^"'\s>]+)\2""")
+
+_template_cache = {}
+
+
+class Template:
+    """An HTML layout compiled into literal segments and named slots.
+
+    `segments` always has one more entry than `slots`; rendering writes
+    segments[0], then each slot followed by the next segment. A minifying
+    template has its whitespace collapsed once at compile time and serializes
+    node values with minify=True. `ids` holds the element ids the template
+    itself defines, which are anchors on every page that uses it.
+
+    href and src attributes naming a key of `asset_urls` are rewritten to its
+    value at compile time. `urls` holds every href and src the source names,
+    and `assets` the rewrites that were made.
+    """
+
+    def __init__(self, source, path=None, mtime_ns=None, minify=False, asset_urls=None):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.minify = minify
+        self.segments = []
+        self.slots = []
+
+        if minify:
+            source = minify_html(source)
+
+        self.urls = {match.group(3) for match in URL_ATTRIBUTE_PATTERN.finditer(source)}
+        self.assets = _used_assets(self.urls, asset_urls)
+        if self.assets:
+            source = URL_ATTRIBUTE_PATTERN.sub(
+                lambda match: f"{match.group(1)}{match.group(2)}{self.assets.get(match.group(3), match.group(3))}{match.group(2)}",
+                source)
+        self.ids = set(ID_PATTERN.findall(source))
+
+        position = 0
+        for match in SLOT_PATTERN.finditer(source):
+            self.segments.append(source[position:match.start()])
+            self.slots.append((match.group(1), match.group()))
+            position = match.end()
+        self.segments.append(source[position:])
+
+    def render(self, stream, values):
+        """Writes the template to a text stream, filling slots from `values`.
+
+        Values with a write_html method (HTML nodes) are streamed into place.
+        Slots without a value are written back out unchanged.
+        """
+        write = stream.write
+        write(self.segments[0])
+        for (name, raw), segment in zip(self.slots, self.segments[1:]):
+            value = values.get(name)
+            if value is None:
+                write(raw)
+            elif hasattr(value, "write_html"):
+                value.write_html(stream, self.minify)
+            else:
+                write(str(value))
+            write(segment)
+
+
+def _used_assets(urls, asset_urls) -> dict:
+    if not asset_urls:
+        return {}
+    return {url: asset_urls[url] for url in urls if url in asset_urls}
+
+
+def load_template(path, minify=False, asset_urls=None) -> Template:
+    """Returns the compiled template at `path`.
+
+    The template is re-read only when its mtime changes or when one of the
+    asset URLs it references is renamed differently.
+    """
+    mtime_ns = os.stat(path).st_mtime_ns
+    template = _template_cache.get((path, minify))
+    if (template is not None and template.mtime_ns == mtime_ns
+            and template.assets == _used_assets(template.urls, asset_urls)):
+        return template
+
+    with open(path, "r", encoding="utf-8") as f:
+        template = Template(f.read(), path, mtime_ns, minify, asset_urls)
+    _template_cache[(path, minify)] = template
+    return template
+
+
+def select_template(from_path, default_path, layouts=None) -> str:
+    """Picks the layout for a page.
+
+    `layouts` maps a content file or directory to a template path; the longest
+    matching prefix wins, so a page entry overrides its directory's entry.
+    """
+    if not layouts:
+        return default_path
+
+    from_path = os.path.normpath(from_path)
+    best_path, best_length = default_path, -1
+    for prefix, layout_path in layouts.items():
+        prefix = os.path.normpath(prefix)
+        if from_path == prefix or from_path.startswith(prefix + os.sep):
+            if len(prefix) > best_length:
+                best_path, best_length = layout_path, len(prefix)
+    return best_path
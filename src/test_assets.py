@@ -0,0 +1,89 @@
+import os, tempfile, unittest
+
+from assets import fingerprint_name, list_files, sync_static
+
+class TestSyncStatic(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "static")
+        self.dest = os.path.join(self.tmp.name, "public")
+        self.write(os.path.join(self.src, "index.css"), "body {}")
+        self.write(os.path.join(self.src, "images", "logo.svg"), "<svg/>")
+        self.write(os.path.join(self.dest, "index.html"), "<p>generated</p>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def test_list_files(self):
+        self.assertEqual(sorted(list_files(self.src)), ["images/logo.svg", "index.css"])
+
+    def test_list_files_skips_ignored(self):
+        self.write(os.path.join(self.src, ".DS_Store"), "")
+        self.write(os.path.join(self.src, "images", "logo.svg:Zone.Identifier"), "[ZoneTransfer]")
+
+        self.assertEqual(sorted(list_files(self.src)), ["images/logo.svg", "index.css"])
+
+    def test_sync_copies_only_changes(self):
+        assets, copied, removed = sync_static(self.src, self.dest)
+        self.assertEqual(assets, ["images/logo.svg", "index.css"])
+        self.assertEqual(copied, ["images/logo.svg", "index.css"])
+        self.assertEqual(removed, [])
+
+        _, copied, _ = sync_static(self.src, self.dest, assets)
+        self.assertEqual(copied, [])
+
+        self.write(os.path.join(self.src, "index.css"), "body { margin: 0 }")
+        _, copied, _ = sync_static(self.src, self.dest, assets)
+        self.assertEqual(copied, ["index.css"])
+
+    def test_sync_removes_deleted_assets_only(self):
+        assets, _, _ = sync_static(self.src, self.dest)
+        os.remove(os.path.join(self.src, "index.css"))
+
+        _, _, removed = sync_static(self.src, self.dest, assets)
+
+        self.assertEqual(removed, ["index.css"])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "index.css")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+    def test_sync_hardlink(self):
+        sync_static(self.src, self.dest, hardlink=True)
+
+        self.assertTrue(os.path.samefile(os.path.join(self.src, "index.css"), os.path.join(self.dest, "index.css")))
+
+    def test_sync_parallel(self):
+        _, copied, _ = sync_static(self.src, self.dest, jobs=4)
+
+        self.assertEqual(copied, ["images/logo.svg", "index.css"])
+        with open(os.path.join(self.dest, "images", "logo.svg")) as f:
+            self.assertEqual(f.read(), "<svg/>")
+
+    def test_fingerprint_name(self):
+        self.assertEqual(fingerprint_name(os.path.join("images", "logo.svg"), "1a2b3c4d5e6f"),
+                         os.path.join("images", "logo.1a2b3c4d.svg"))
+
+    def test_sync_rename(self):
+        rename = lambda rel_path, stat: fingerprint_name(rel_path, str(stat.st_size) * 8)
+        assets, copied, _ = sync_static(self.src, self.dest, rename=rename)
+
+        self.assertEqual(assets, ["images/logo.svg", "index.css"])
+        self.assertEqual(copied, ["images/logo.svg", "index.css"])
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.77777777.css")))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "index.css")))
+
+        self.write(os.path.join(self.src, "index.css"), "body { margin: 0 }")
+        previous = ["images/logo.66666666.svg", "index.77777777.css"]
+        _, copied, removed = sync_static(self.src, self.dest, previous, rename=rename)
+
+        self.assertEqual(copied, ["index.css"])
+        self.assertEqual(removed, ["index.77777777.css"])
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.18181818.css")))
+
+if __name__ == '__main__':
+    unittest.main()
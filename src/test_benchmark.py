@@ -0,0 +1,28 @@
+import os, tempfile, unittest
+
+from benchmark import generate_corpus, benchmark_corpus
+
+class TestCorpus(unittest.TestCase):
+
+    def test_generate_corpus_reproducible(self):
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+            paths_first = generate_corpus(first, "deep", seed=3, scale=0.01)
+            paths_second = generate_corpus(second, "deep", seed=3, scale=0.01)
+
+            self.assertEqual(len(paths_first), 10)
+            for path_first, path_second in zip(paths_first, paths_second):
+                self.assertEqual(os.path.relpath(path_first, first), os.path.relpath(path_second, second))
+                with open(path_first) as f_first, open(path_second) as f_second:
+                    self.assertEqual(f_first.read(), f_second.read())
+
+    def test_benchmark_corpus_stages(self):
+        template = os.path.join(os.path.dirname(__file__), "..", "template.html")
+        with tempfile.TemporaryDirectory() as root:
+            generate_corpus(root, "lists", scale=0.01)
+            results = benchmark_corpus(root, template)
+
+        self.assertEqual(list(results), ["parse", "classify", "inline", "serialise", "io"])
+        self.assertTrue(all(amount > 0 for _, amount, _ in results.values()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import gzip, os, tempfile, time, unittest
+
+from compress import available_encodings, compress_file, precompress_tree, remove_siblings
+
+class TestPrecompress(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.page = self.write("index.html", "<p>page</p>" * 100)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, text):
+        path = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_gzip_always_available(self):
+        self.assertIn("gz", available_encodings())
+
+    def test_compress_file_roundtrip(self):
+        self.assertEqual(compress_file(self.page, ["gz"]), ["gz"])
+
+        with gzip.open(self.page + ".gz", "rt") as f:
+            self.assertEqual(f.read(), "<p>page</p>" * 100)
+
+    def test_compress_file_skips_unchanged(self):
+        compress_file(self.page, ["gz"])
+        self.assertEqual(compress_file(self.page, ["gz"]), [])
+
+        self.write("index.html", "<p>changed</p>" * 100)
+        os.utime(self.page, ns=(time.time_ns(), os.stat(self.page + ".gz").st_mtime_ns + 1))
+        self.assertEqual(compress_file(self.page, ["gz"]), ["gz"])
+
+    def test_precompress_tree(self):
+        self.write("tiny.css", "a{}")
+        self.write("images/photo.png", "x" * 1000)
+        self.write("downloads/data.tar.gz", "archive")
+
+        written, removed = precompress_tree(self.root, ["gz"], jobs=2)
+
+        self.assertEqual((written, removed), (1, 0))
+        self.assertTrue(os.path.exists(self.page + ".gz"))
+        self.assertTrue(os.path.exists(os.path.join(self.root, "downloads", "data.tar.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.root, "tiny.css.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.root, "images", "photo.png.gz")))
+
+    def test_precompress_tree_removes_orphans(self):
+        precompress_tree(self.root, ["gz"])
+        os.remove(self.page)
+
+        written, removed = precompress_tree(self.root, ["gz"])
+
+        self.assertEqual((written, removed), (0, 1))
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+
+    def test_precompress_tree_removes_unavailable_encodings(self):
+        # Written by an earlier build that had brotli and zstd; this one only has gzip.
+        self.write("index.html.br", "stale")
+        self.write("index.html.zst", "stale")
+
+        written, removed = precompress_tree(self.root, ["gz"])
+
+        self.assertEqual((written, removed), (1, 2))
+        self.assertTrue(os.path.exists(self.page + ".gz"))
+        self.assertFalse(os.path.exists(self.page + ".br"))
+        self.assertFalse(os.path.exists(self.page + ".zst"))
+
+    def test_remove_siblings(self):
+        compress_file(self.page, ["gz"])
+        self.write("index.html.br", "stale")
+        archive = self.write("data.tar", "archive")
+        self.write("data.tar.gz", "archive")
+
+        self.assertEqual(remove_siblings([self.page, archive, os.path.join(self.root, "missing.html")]), 2)
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+        self.assertFalse(os.path.exists(self.page + ".br"))
+        self.assertTrue(os.path.exists(archive + ".gz"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import os, tempfile, time, unittest
+
+from discovery import TreeIndex, is_ignored
+
+class TestTreeIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "content")
+        for rel_path in ("index.md", "blog/post.md", "blog-archive.md", ".draft.md", "blog/.swp",
+                         "images/elf.png:Zone.Identifier", ".git/config"):
+            self.write(rel_path)
+        self.age(self.root)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path):
+        path = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(rel_path)
+
+    def age(self, path):
+        # Listings of directories changed within the last couple of seconds aren't kept.
+        old = time.time_ns() - 60 * 10 ** 9
+        for directory, _, _ in os.walk(path):
+            os.utime(directory, ns=(old, old))
+
+    def test_is_ignored(self):
+        self.assertTrue(is_ignored(".DS_Store"))
+        self.assertTrue(is_ignored("rivendell.png:Zone.Identifier"))
+        self.assertFalse(is_ignored("index.md"))
+
+    def test_files_in_walk_order(self):
+        self.assertEqual(TreeIndex().files(self.root),
+                         [os.path.join("blog", "post.md"), "blog-archive.md", "index.md"])
+
+    def test_unchanged_directories_are_not_listed(self):
+        path = os.path.join(self.tmp.name, "tree.json")
+        index = TreeIndex(path)
+        index.files(self.root)
+        index.save()
+
+        loaded = TreeIndex.load(path)
+        self.assertEqual(loaded.files(self.root), index.files(self.root))
+        self.assertEqual(loaded.listed, 0)
+
+        self.write("blog/second.md")
+        self.age(os.path.join(self.root, "blog"))
+
+        self.assertIn(os.path.join("blog", "second.md"), loaded.files(self.root))
+        self.assertEqual(loaded.listed, 1)
+
+    def test_recent_directories_are_listed_again(self):
+        index = TreeIndex()
+        index.files(self.root)
+        self.write("blog/second.md")
+
+        self.assertIn(os.path.join("blog", "second.md"), index.files(self.root))
+        self.assertNotIn(os.path.join(self.root, "blog"), index.dirs)
+
+    def test_removed_directories_are_dropped(self):
+        index = TreeIndex()
+        index.files(self.root)
+        os.remove(os.path.join(self.root, "blog", "post.md"))
+        os.remove(os.path.join(self.root, "blog", ".swp"))
+        os.rmdir(os.path.join(self.root, "blog"))
+
+        self.assertEqual(index.files(self.root), ["blog-archive.md", "index.md"])
+        self.assertNotIn(os.path.join(self.root, "blog"), index.dirs)
+
+if __name__ == '__main__':
+    unittest.main()
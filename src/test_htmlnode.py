@@ -1,6 +1,6 @@
-import unittest
+import io, unittest
 
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import HTMLNode, LeafNode, ParentNode, RawNode, minify_html
 
 class TestHTMLNode(unittest.TestCase):
 
@@ -49,6 +49,10 @@ class TestLeafNode(unittest.TestCase):
 
         self.assertEqual(leaf_node.to_html(), "This is just plain text")
 
+    def test_slots(self):
+        leaf_node = LeafNode(tag="b", value="Bold text")
+        self.assertFalse(hasattr(leaf_node, "__dict__"))
+
 
 class TestParentNode(unittest.TestCase):
     
@@ -116,5 +120,50 @@ class TestParentNode(unittest.TestCase):
                         '<p>Plain text</p></h3></p>'
                         )
 
+    def test_write_html_matches_to_html(self):
+        parent_node = ParentNode(tag="ul", children=[
+                    ParentNode(tag="li", children=[LeafNode(tag="b", value="item %d" % i)]) for i in range(100)
+                    ])
+
+        stream = io.StringIO()
+        parent_node.write_html(stream)
+
+        self.assertEqual(stream.getvalue(), parent_node.to_html())
+        self.assertTrue(stream.getvalue().startswith("<ul><li><b>item 0</b></li>"))
+
+    def test_raw_child(self):
+        parent_node = ParentNode(tag="div", children=[RawNode("<p>rendered</p>"), LeafNode(tag="b", value="Bold text")])
+
+        self.assertEqual(parent_node.to_html(), "<div><p>rendered</p><b>Bold text</b></div>")
+
+    def test_write_html_notag(self):
+        parent_node = ParentNode(tag=None, children=[LeafNode(tag="b", value="Bold text")])
+
+        with self.assertRaises(ValueError):
+            parent_node.write_html(io.StringIO())
+
+    def test_to_html_minify(self):
+        parent_node = ParentNode(tag="p", children=[
+                    LeafNode(tag="a", value="Click me!", props={"href": "/majesty", "title": "a link"}),
+                    LeafNode(tag="img", value="", props={"src": "/images/x.png", "alt": ""}),
+                    ])
+
+        self.assertEqual(parent_node.to_html(minify=True),
+                         '<p><a href=/majesty title="a link">Click me!</a><img src=/images/x.png alt=""></p>')
+        self.assertEqual(parent_node.to_html(),
+                         '<p><a href="/majesty" title="a link">Click me!</a><img src="/images/x.png" alt=""/></p>')
+
+    def test_minify_html(self):
+        source = "<html>\n  <body>\n    <p>Some   text\n here</p>\n    <pre><code>\n  keep  me\n</code></pre>\n  </body>\n</html>\n"
+
+        self.assertEqual(minify_html(source),
+                         "<html><body><p>Some text here</p><pre><code>\n  keep  me\n</code></pre></body></html>")
+
+    def test_minify_html_keeps_inline_spaces(self):
+        self.assertEqual(minify_html("<b>bold</b>\n<i>it</i>"), "<b>bold</b> <i>it</i>")
+        self.assertEqual(minify_html("<p>Home\n  <a href=x>About</a>\n</p>"), "<p>Home <a href=x>About</a></p>")
+        self.assertEqual(minify_html("<li>see\n<code>x  y</code>\nnow</li>"), "<li>see <code>x  y</code> now</li>")
+        self.assertEqual(minify_html("<!DOCTYPE html>\n<title> Home </title>\n"), "<!DOCTYPE html><title>Home</title>")
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,53 @@
+import os, unittest
+
+from links import LinkIndex, output_url
+
+class TestLinkIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = LinkIndex()
+        self.index.add_page("/index.html", {"main"})
+        self.index.add_page("/blog/index.html")
+        self.index.add_page("/blog/post.html")
+        self.index.add_asset("/images/elf.png")
+
+    def test_output_url(self):
+        self.assertEqual(output_url(os.path.join("public", "blog", "index.html"), "public"), "/blog/index.html")
+
+    def test_resolve_absolute(self):
+        self.assertEqual(self.index.resolve("/blog/post.html", "/index.html"), "/blog/post.html")
+        self.assertEqual(self.index.resolve("/images/elf.png", "/index.html"), "/images/elf.png")
+        self.assertIsNone(self.index.resolve("/images/orc.png", "/index.html"))
+
+    def test_resolve_directory_index(self):
+        self.assertEqual(self.index.resolve("/", "/blog/post.html"), "/index.html")
+        self.assertEqual(self.index.resolve("/blog", "/index.html"), "/blog/index.html")
+        self.assertEqual(self.index.resolve("/blog/", "/index.html"), "/blog/index.html")
+
+    def test_resolve_relative(self):
+        self.assertEqual(self.index.resolve("post.html", "/blog/index.html"), "/blog/post.html")
+        self.assertEqual(self.index.resolve("../images/elf.png", "/blog/post.html"), "/images/elf.png")
+        self.assertIsNone(self.index.resolve("missing.html", "/blog/index.html"))
+
+    def test_resolve_fragment(self):
+        self.assertEqual(self.index.resolve("/#main", "/blog/post.html"), "/index.html")
+        self.assertEqual(self.index.resolve("#main", "/index.html"), "/index.html")
+        self.assertIsNone(self.index.resolve("/blog/post.html#missing", "/index.html"))
+
+    def test_external_links_are_not_checked(self):
+        self.assertEqual(self.index.resolve("https://example.com/nope", "/index.html"), "https://example.com/nope")
+        self.assertEqual(self.index.resolve("mailto:elrond@example.com", "/index.html"), "mailto:elrond@example.com")
+
+    def test_broken_links(self):
+        pages = [
+            ("content/index.md", "/index.html", [("link", "/blog"), ("image", "/images/orc.png")]),
+            ("content/blog/post.md", "/blog/post.html", [("link", "../nope.html"), ("link", "index.html")]),
+        ]
+
+        self.assertEqual(self.index.broken_links(pages), [
+            ("content/index.md", "image", "/images/orc.png"),
+            ("content/blog/post.md", "link", "../nope.html"),
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,238 @@
+import os, tempfile, unittest
+
+from config import BuildConfig
+from main import BuildError, build_pages, parse_args, rebuild_changed, run
+from manifest import BuildManifest
+from watch import LiveReload
+
+TEMPLATE = '<html><head><title>{{ Title }}</title><link href="/index.css"></head><body>{{ Content }}</body></html>'
+
+PAGES = {
+    "index.md": "# Home\n\nWelcome to [the blog](/blog/).",
+    "about.md": "# About\n\nSome *text* and `code`.",
+    "blog/index.md": "# Blog\n\n- [First](/blog/first.html)\n- [Second](/blog/second.html)",
+    "blog/first.md": "# First\n\n![cat](/images/cat.png)\n\n> A quote",
+    "blog/second.md": "# Second\n\n```\nprint('hi')\n```",
+    "blog/2024/recap.md": "# Recap\n\n1. one\n2. two",
+}
+
+class TestBuild(unittest.TestCase):
+    """End-to-end builds of a small site, run from inside a temporary directory."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def make_site(self, name, pages=PAGES):
+        # Changes into the new site, since the build works on ./content, ./public and so on.
+        root = os.path.join(self.tmp.name, name)
+        os.makedirs(root)
+        os.chdir(root)
+        self.write("template.html", TEMPLATE)
+        self.write(os.path.join("static", "index.css"), "body { margin: 0; }")
+        self.write(os.path.join("static", "images", "cat.png"), "png")
+        for rel_path, text in pages.items():
+            self.write(os.path.join("content", rel_path), text)
+        return root
+
+    def build(self, *argv) -> list:
+        # Returns the sources generated, in the order they were recorded.
+        with self.assertLogs("ssg", "DEBUG") as logs:
+            run(parse_args(list(argv)))
+        return [record.args[0] for record in logs.records if record.msg.startswith("Generated page")]
+
+    def outputs(self, directory="public") -> dict:
+        files = {}
+        for dirpath, _, filenames in os.walk(directory):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                with open(path, "rb") as f:
+                    files[os.path.relpath(path, directory)] = f.read()
+        return files
+
+    def test_parallel_build_matches_serial(self):
+        results = []
+        for name, argv in (("serial", ["--jobs", "1"]), ("pool", ["--jobs", "2"]),
+                           ("bounded", ["--jobs", "2", "--low-memory"])):
+            self.make_site(name)
+            generated = self.build(*argv)
+            results.append((generated, self.outputs()))
+
+        serial_generated, serial_outputs = results[0]
+        self.assertEqual(len(serial_generated), len(PAGES))
+        self.assertIn(os.path.join("blog", "2024", "recap.html"), serial_outputs)
+        for generated, outputs in results[1:]:
+            self.assertEqual(generated, serial_generated)
+            self.assertEqual(outputs, serial_outputs)
+
+    def test_skips_fresh_pages(self):
+        self.make_site("site")
+        self.assertEqual(len(self.build()), len(PAGES))
+        self.assertEqual(self.build(), [])
+
+        self.write(os.path.join("content", "about.md"), "# About\n\nNew text.")
+        self.assertEqual(self.build("--jobs", "2"), [os.path.join(".", "content", "about.md")])
+
+        self.write("template.html", TEMPLATE.replace("<body>", "<body><nav>Home</nav>"))
+        self.assertEqual(len(self.build()), len(PAGES))
+        with open(os.path.join("public", "index.html")) as f:
+            self.assertIn("<nav>Home</nav>", f.read())
+
+    def test_removes_stale_outputs(self):
+        self.make_site("site")
+        self.build()
+
+        os.remove(os.path.join("content", "blog", "second.md"))
+        self.assertEqual(self.build(), [])
+
+        self.assertFalse(os.path.exists(os.path.join("public", "blog", "second.html")))
+        self.assertTrue(os.path.exists(os.path.join("public", "blog", "first.html")))
+        manifest = BuildManifest.load(os.path.join(".cache", "manifest.json"))
+        self.assertNotIn(os.path.join(".", "content", "blog", "second.md"), manifest.pages)
+
+    def test_failed_pages_are_collected(self):
+        pages = dict(PAGES, **{"untitled.md": "No heading here.", "blog/draft.md": "Just a draft."})
+        self.make_site("site", pages)
+
+        for argv in (["--jobs", "1"], ["--jobs", "2"]):
+            with self.assertRaises(BuildError) as raised:
+                self.build("--force", *argv)
+
+            failed = sorted(from_path for from_path, _ in raised.exception.failures)
+            self.assertEqual(failed, [os.path.join(".", "content", "blog", "draft.md"),
+                                      os.path.join(".", "content", "untitled.md")])
+            self.assertEqual(len(self.outputs()) - 2, len(PAGES))
+            self.assertFalse(os.path.exists(os.path.join("public", "untitled.html")))
+
+        # The pages that built were recorded, so only the fixed one is built again.
+        self.write(os.path.join("content", "untitled.md"), "# Untitled")
+        with self.assertRaises(BuildError) as raised:
+            self.build()
+        self.assertEqual(len(raised.exception.failures), 1)
+        self.assertTrue(os.path.exists(os.path.join("public", "untitled.html")))
+
+    def test_failed_page_keeps_previous_output(self):
+        self.make_site("site")
+        self.build()
+        before = self.outputs()
+
+        self.write(os.path.join("content", "about.md"), "# About\n\nSome text\n\n* \n* item")
+        for argv in (["--block-cache-size", "0"], ["--low-memory"]):
+            with self.assertRaises(BuildError):
+                self.build(*argv)
+
+            self.assertEqual(self.outputs(), before)
+
+    def test_rebuild_changed(self):
+        self.make_site("site")
+        self.build()
+        args = parse_args([])
+        config = BuildConfig.from_args(args)
+        manifest = BuildManifest.load(config.manifest)
+        live_reload = LiveReload()
+
+        about = os.path.join(config.content, "about.md")
+        self.write(about, "# About\n\nChanged.")
+        with self.assertLogs("ssg", "INFO") as logs:
+            rebuild_changed(config, args, manifest, live_reload, {about}, set())
+        self.assertEqual([record.args[0] for record in logs.records if record.msg.startswith("Generated page")],
+                         [about])
+        with open(os.path.join("public", "about.html")) as f:
+            self.assertIn("Changed.", f.read())
+
+        # A page linking to an image is rebuilt when the image changes.
+        image = os.path.join(config.static, "images", "cat.png")
+        self.write(image, "new png")
+        with self.assertLogs("ssg", "INFO") as logs:
+            rebuild_changed(config, args, manifest, live_reload, {image}, set())
+        self.assertEqual([record.args[0] for record in logs.records if record.msg.startswith("Generated page")],
+                         [os.path.join(config.content, "blog", "first.md")])
+
+        os.remove(about)
+        with self.assertLogs("ssg", "INFO"):
+            rebuild_changed(config, args, manifest, live_reload, set(), {about})
+        self.assertFalse(os.path.exists(os.path.join("public", "about.html")))
+        self.assertEqual(live_reload.generation, 3)
+
+    def test_rebuild_changed_survives_missing_files(self):
+        self.make_site("site")
+        self.build()
+        args = parse_args(["--check-links"])
+        config = BuildConfig.from_args(args)
+        manifest = BuildManifest.load(config.manifest)
+        live_reload = LiveReload()
+
+        # Saved by deleting and rewriting: the template is briefly missing.
+        os.remove(config.template)
+        with self.assertLogs("ssg", "ERROR"):
+            rebuild_changed(config, args, manifest, live_reload, set(), {config.template})
+        self.write(config.template, TEMPLATE.replace("<body>", "<body><nav>Home</nav>"))
+        with self.assertLogs("ssg", "INFO") as logs:
+            rebuild_changed(config, args, manifest, live_reload, {config.template}, set())
+
+        generated = [record.args[0] for record in logs.records if record.msg.startswith("Generated page")]
+        self.assertEqual(len(generated), len(PAGES))
+        with open(os.path.join("public", "index.html")) as f:
+            self.assertIn("<nav>Home</nav>", f.read())
+
+    def test_missing_source_is_collected(self):
+        self.make_site("site")
+        config = BuildConfig(jobs=2)
+        pages = [(os.path.join(config.content, "gone.md"), os.path.join(config.public, "gone.html")),
+                 (os.path.join(config.content, "about.md"), os.path.join(config.public, "about.html"))]
+
+        with self.assertRaises(BuildError) as raised:
+            build_pages(pages, config, BuildManifest(config.manifest))
+
+        self.assertEqual([from_path for from_path, _ in raised.exception.failures], [pages[0][0]])
+        self.assertIsInstance(raised.exception.failures[0][1], FileNotFoundError)
+        self.assertTrue(os.path.exists(pages[1][1]))
+
+    def test_rebuild_changed_template_asset(self):
+        # The pages only reference index.css through the template, yet they have
+        # to follow it to its new fingerprinted name.
+        self.make_site("site")
+        self.build("--fingerprint-assets")
+        args = parse_args(["--fingerprint-assets"])
+        config = BuildConfig.from_args(args)
+        manifest = BuildManifest.load(config.manifest)
+
+        stylesheet = os.path.join(config.static, "index.css")
+        self.write(stylesheet, "body { margin: 1em; }")
+        with self.assertLogs("ssg", "INFO") as logs:
+            rebuild_changed(config, args, manifest, LiveReload(), {stylesheet}, set())
+
+        generated = [record.args[0] for record in logs.records if record.msg.startswith("Generated page")]
+        self.assertEqual(len(generated), len(PAGES))
+        css_name = manifest.fingerprints["index.css"][2]
+        self.assertTrue(os.path.exists(os.path.join("public", css_name)))
+        for rel_path in ("index.html", os.path.join("blog", "first.html")):
+            with open(os.path.join("public", rel_path)) as f:
+                self.assertIn(f'href="/{css_name}"', f.read())
+
+    def test_merge_shards(self):
+        self.make_site("whole")
+        self.build()
+        whole = self.outputs()
+
+        self.make_site("sharded")
+        shard_generated = self.build("--shard", "1/2") + self.build("--shard", "2/2")
+        self.assertEqual(sorted(shard_generated), sorted(os.path.join(".", "content", rel_path) for rel_path in PAGES))
+        with self.assertLogs("ssg", "INFO"):
+            run(parse_args(["--merge-shards", "2"]))
+
+        self.assertEqual(self.outputs(), whole)
+        # The merged manifest covers every page, so a normal build has nothing left to do.
+        self.assertEqual(self.build(), [])
+
+if __name__ == '__main__':
+    unittest.main()
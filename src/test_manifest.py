@@ -0,0 +1,129 @@
+import os, tempfile, time, unittest
+
+from manifest import BuildManifest, DependencyGraph, hash_bytes, hash_file
+
+class TestBuildManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.tmp.name, "index.html")
+        self.path = os.path.join(self.tmp.name, "manifest.json")
+        with open(self.dest, "wb") as f:
+            f.write(b"<p>page</p>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hash_file(self):
+        self.assertEqual(hash_file(self.dest), hash_bytes(b"<p>page</p>"))
+
+    def test_fresh_after_record(self):
+        manifest = BuildManifest(self.path)
+        manifest.record("index.md", "src", "tmpl", self.dest, hash_bytes(b"<p>page</p>"))
+
+        self.assertTrue(manifest.is_fresh("index.md", "src", "tmpl", self.dest))
+        self.assertFalse(manifest.is_fresh("index.md", "changed", "tmpl", self.dest))
+        self.assertFalse(manifest.is_fresh("index.md", "src", "changed", self.dest))
+        self.assertFalse(manifest.is_fresh("other.md", "src", "tmpl", self.dest))
+
+    def test_not_fresh_when_output_modified(self):
+        manifest = BuildManifest(self.path)
+        manifest.record("index.md", "src", "tmpl", self.dest, hash_bytes(b"<p>page</p>"))
+        with open(self.dest, "wb") as f:
+            f.write(b"<p>edited by hand</p>")
+
+        self.assertFalse(manifest.is_fresh("index.md", "src", "tmpl", self.dest))
+
+    def test_not_fresh_when_output_missing(self):
+        manifest = BuildManifest(self.path)
+        manifest.record("index.md", "src", "tmpl", self.dest, hash_bytes(b"<p>page</p>"))
+        os.remove(self.dest)
+
+        self.assertFalse(manifest.is_fresh("index.md", "src", "tmpl", self.dest))
+
+    def test_save_load_roundtrip(self):
+        manifest = BuildManifest(self.path)
+        manifest.record("index.md", "src", "tmpl", self.dest, hash_bytes(b"<p>page</p>"))
+        manifest.save()
+
+        loaded = BuildManifest.load(self.path)
+        self.assertEqual(loaded.pages, manifest.pages)
+
+    def test_load_corrupt(self):
+        with open(self.path, "w") as f:
+            f.write("{not json")
+
+        self.assertEqual(BuildManifest.load(self.path).pages, {})
+
+    def test_remove_stale(self):
+        manifest = BuildManifest(self.path)
+        manifest.record("index.md", "src", "tmpl", self.dest, hash_bytes(b"<p>page</p>"))
+
+        removed = manifest.remove_stale([])
+
+        self.assertEqual(removed, [self.dest])
+        self.assertFalse(os.path.exists(self.dest))
+        self.assertEqual(manifest.pages, {})
+
+class TestDependencyGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.image = os.path.join(self.tmp.name, "elf.png")
+        for path in (self.template, self.image):
+            with open(path, "w") as f:
+                f.write(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_stale_when_dependency_changes(self):
+        graph = DependencyGraph()
+        graph.record("index.md", [self.template, self.image])
+        graph.record("other.md", [self.template])
+
+        self.assertFalse(graph.is_stale("index.md"))
+        self.assertTrue(graph.is_stale("unknown.md"))
+
+        with open(self.image, "w") as f:
+            f.write("a different image")
+
+        self.assertTrue(graph.is_stale("index.md"))
+        self.assertFalse(graph.is_stale("other.md"))
+
+    def test_touched_dependency_is_not_stale(self):
+        graph = DependencyGraph()
+        graph.record("index.md", [self.template])
+        os.utime(self.template, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+
+        self.assertFalse(graph.is_stale("index.md"))
+
+    def test_stale_when_dependency_removed(self):
+        graph = DependencyGraph()
+        graph.record("index.md", [self.image])
+        os.remove(self.image)
+
+        self.assertTrue(graph.is_stale("index.md"))
+
+    def test_dependents(self):
+        graph = DependencyGraph()
+        graph.record("index.md", [self.template, self.image])
+        graph.record("other.md", [self.template])
+
+        self.assertEqual(graph.dependents([self.image]), {"index.md"})
+        self.assertEqual(graph.dependents([self.template]), {"index.md", "other.md"})
+        self.assertEqual(graph.dependents(["unrelated.css"]), set())
+
+    def test_saved_with_manifest(self):
+        path = os.path.join(self.tmp.name, "manifest.json")
+        manifest = BuildManifest(path)
+        manifest.graph.record("index.md", [self.template])
+        manifest.save()
+
+        loaded = BuildManifest.load(path)
+        self.assertEqual(loaded.graph.edges, manifest.graph.edges)
+        self.assertEqual(loaded.graph.dependents([self.template]), {"index.md"})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,9 @@
-import unittest
+import io, unittest
 
 from mod_markdown import text_node_to_html_node, split_nodes_delimiter, extract_markdown_images, extract_markdown_links
 from mod_markdown import split_nodes_image, split_nodes_link, text_to_textnodes, markdown_to_blocks, block_to_block_type
-from mod_markdown import markdown_to_html_node, extract_title
+from mod_markdown import markdown_to_html_node, extract_title, classify_block, iter_blocks, write_markdown_html
+from mod_markdown import BlockCache
 from textnode import TextNode, TextType
 from htmlnode import HTMLNode, LeafNode
 
@@ -272,6 +273,57 @@ class TestMarkdownToNodes(unittest.TestCase):
         self.assertEqual(text_to_textnodes(raw2), expected_result2)
         self.assertEqual(text_to_textnodes(raw3), expected_result3)
     
+    def test_text_to_textnodes_multiple_pairs(self):
+        raw = "This has **two** bold **words** and *two* italic *words*"
+
+        expected_result = [
+            TextNode("This has ", TextType.TEXT, None),
+            TextNode("two", TextType.BOLD, None),
+            TextNode(" bold ", TextType.TEXT, None),
+            TextNode("words", TextType.BOLD, None),
+            TextNode(" and ", TextType.TEXT, None),
+            TextNode("two", TextType.ITALIC, None),
+            TextNode(" italic ", TextType.TEXT, None),
+            TextNode("words", TextType.ITALIC, None),
+            ]
+
+        self.assertEqual(text_to_textnodes(raw), expected_result)
+
+    def test_text_to_textnodes_code_keeps_delimiters(self):
+        raw = "Use `a*b*c` here"
+
+        expected_result = [
+            TextNode("Use ", TextType.TEXT, None),
+            TextNode("a*b*c", TextType.CODE, None),
+            TextNode(" here", TextType.TEXT, None),
+            ]
+
+        self.assertEqual(text_to_textnodes(raw), expected_result)
+
+    def test_text_to_textnodes_unmatched(self):
+        raw = "A lone * star and [no link] here"
+
+        self.assertEqual(text_to_textnodes(raw), [TextNode(raw, TextType.TEXT, None)])
+
+    def test_text_to_textnodes_links_inside_delimiters(self):
+        self.assertEqual(text_to_textnodes("*[a](/x)*"), [
+            TextNode("*", TextType.TEXT, None),
+            TextNode("a", TextType.LINK, "/x"),
+            TextNode("*", TextType.TEXT, None),
+        ])
+        self.assertEqual(text_to_textnodes("a -> [b](/c) -> d"), [
+            TextNode("a -> ", TextType.TEXT, None),
+            TextNode("b", TextType.LINK, "/c"),
+            TextNode(" -> d", TextType.TEXT, None),
+        ])
+        self.assertEqual(text_to_textnodes("x * y ![i](/i.png) z * w *w*"), [
+            TextNode("x * y ", TextType.TEXT, None),
+            TextNode("i", TextType.IMAGE, "/i.png"),
+            TextNode(" z ", TextType.TEXT, None),
+            TextNode(" w ", TextType.ITALIC, None),
+            TextNode("w*", TextType.TEXT, None),
+        ])
+
     def test_text_to_textnodes_empty(self):
         raw = ""
 
@@ -328,6 +380,17 @@ class TestMarkdownToBlocks(unittest.TestCase):
 
         assert markdown_to_blocks(markdown) == expected_result
 
+    def test_iter_blocks_matches_markdown_to_blocks(self):
+        markdown = ("\n\n# This is a heading   \n\n\n"
+                    "Paragraph text\nover two lines\n  \t \n"
+                    "* item\n* another item\n\n"
+                    "   1. First item\n2. Second item   ")
+
+        self.assertEqual(list(iter_blocks(io.StringIO(markdown))), markdown_to_blocks(markdown))
+
+    def test_iter_blocks_empty(self):
+        self.assertEqual(list(iter_blocks([])), [])
+
 class TestBlockToBlock(unittest.TestCase):
 
     def test_block_to_block_type(self):
@@ -362,6 +425,20 @@ class TestBlockToBlock(unittest.TestCase):
 
         assert block_to_block_type(block) == "paragraph"
 
+    def test_classify_block_heading_level(self):
+        self.assertEqual(classify_block("### Heading with a # inside"), ("heading", ["Heading with a # inside"], 3))
+        self.assertEqual(classify_block("####### too deep")[0], "paragraph")
+
+    def test_classify_block_items(self):
+        unordered = "* first item\n- second item\n+ third item"
+        ordered = "\n".join(f"{number}. item {number}" for number in range(1, 12))
+
+        self.assertEqual(classify_block(unordered), ("unordered list", ["first item", "second item", "third item"], 0))
+        self.assertEqual(classify_block(ordered), ("ordered list", [f"item {number}" for number in range(1, 12)], 0))
+
+    def test_classify_block_broken_sequence(self):
+        self.assertEqual(classify_block("1. first\n3. third"), ("paragraph", ["1. first\n3. third"], 0))
+
 class TestMarkdownToHTML(unittest.TestCase):
 
     def test_markdown_to_html(self):
@@ -393,6 +470,59 @@ class TestMarkdownToHTML(unittest.TestCase):
         self.assertEqual(result5, expected5)
         self.assertEqual(result6, expected6)
     
+    def test_write_markdown_html_matches_tree(self):
+        markdown = "# heading\n\nparagraph with **bold**\n\n* item\n* another item\n\n1. first\n2. second"
+
+        stream = io.StringIO()
+        write_markdown_html(io.StringIO(markdown), stream)
+
+        self.assertEqual(stream.getvalue(), markdown_to_html_node(markdown).to_html())
+
+    def test_markdown_to_html_block_cache(self):
+        markdown = "# heading\n\nshared *disclaimer*\n\n* item\n* another item"
+        block_cache = BlockCache()
+
+        first = markdown_to_html_node(markdown, block_cache).to_html()
+        second = markdown_to_html_node(markdown, block_cache).to_html()
+
+        self.assertEqual(first, markdown_to_html_node(markdown).to_html())
+        self.assertEqual(second, first)
+        self.assertEqual((block_cache.hits, block_cache.misses), (3, 3))
+
+    def test_block_cache_lru(self):
+        block_cache = BlockCache(max_entries=2)
+
+        block_cache.render("first")
+        block_cache.render("second")
+        block_cache.render("first")
+        block_cache.render("third")
+        block_cache.render("second")
+
+        self.assertEqual(len(block_cache), 2)
+        self.assertEqual((block_cache.hits, block_cache.misses), (1, 4))
+
+    def test_markdown_to_html_collects_links(self):
+        markdown = "Read [my post](/majesty)\n\n* ![elf](/images/elf.png)\n* [home](/)"
+        block_cache = BlockCache()
+        expected = [("link", "/majesty"), ("image", "/images/elf.png"), ("link", "/")]
+
+        for cache in (None, block_cache, block_cache):
+            links = []
+            markdown_to_html_node(markdown, cache, links)
+            self.assertEqual(links, expected)
+        self.assertEqual(block_cache.hits, 2)
+
+    def test_markdown_to_html_asset_urls(self):
+        markdown = "![elf](/images/elf.png) and [the pdf](/lore.pdf) at [home](/)"
+        asset_urls = {"/images/elf.png": "/images/elf.1a2b3c4d.png", "/lore.pdf": "/lore.5e6f7a8b.pdf"}
+        expected = ('<div><p><img src="/images/elf.1a2b3c4d.png" alt="elf"/> and '
+                    '<a href="/lore.5e6f7a8b.pdf">the pdf</a> at <a href="/">home</a></p></div>')
+
+        links = []
+        self.assertEqual(markdown_to_html_node(markdown, links=links, asset_urls=asset_urls).to_html(), expected)
+        self.assertEqual(markdown_to_html_node(markdown, BlockCache(asset_urls=asset_urls)).to_html(), expected)
+        self.assertEqual(links, [("image", "/images/elf.png"), ("link", "/lore.pdf"), ("link", "/")])
+
     # add more tests for edge cases and errors.
 
 class TestMarkdownTitle(unittest.TestCase):
@@ -0,0 +1,109 @@
+import os, tempfile, threading, unittest
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+from ondemand import PageCache, content_path, make_on_demand_server
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+class TestContentPath(unittest.TestCase):
+
+    def test_maps_urls_to_markdown(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write(os.path.join(tmp, "index.md"), "# Home")
+            write(os.path.join(tmp, "blog", "index.md"), "# Blog")
+            write(os.path.join(tmp, "blog", "post.md"), "# Post")
+
+            self.assertEqual(content_path("/", tmp), os.path.join(tmp, "index.md"))
+            self.assertEqual(content_path("/blog/", tmp), os.path.join(tmp, "blog", "index.md"))
+            self.assertEqual(content_path("/blog/index.html", tmp), os.path.join(tmp, "blog", "index.md"))
+            self.assertEqual(content_path("/blog/post.html", tmp), os.path.join(tmp, "blog", "post.md"))
+            self.assertIsNone(content_path("/blog", tmp))
+            self.assertIsNone(content_path("/missing/", tmp))
+            self.assertIsNone(content_path("/index.css", tmp))
+
+    def test_stays_inside_content(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write(os.path.join(tmp, "index.md"), "# Home")
+            write(os.path.join(tmp, "content", "index.md"), "# Home")
+            write(os.path.join(tmp, "content", ".drafts", "index.md"), "# Draft")
+            content = os.path.join(tmp, "content")
+
+            self.assertEqual(content_path("/../", content), os.path.join(content, "index.md"))
+            self.assertIsNone(content_path("/.drafts/", content))
+
+class TestPageCache(unittest.TestCase):
+
+    def test_invalidated_by_mtime(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "index.md")
+            write(source, "# Home")
+            cache = PageCache()
+            cache.put(source, b"<h1>Home</h1>", [source])
+
+            self.assertEqual(cache.get(source), b"<h1>Home</h1>")
+
+            stat = os.stat(source)
+            os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+            self.assertIsNone(cache.get(source))
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        cache = PageCache(max_bytes=10)
+        cache.put("a", b"aaaa", [])
+        cache.put("b", b"bbbb", [])
+        cache.get("a")
+        cache.put("c", b"cccc", [])
+
+        self.assertEqual(cache.get("a"), b"aaaa")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.size, 8)
+
+    def test_skips_oversized_pages(self):
+        cache = PageCache(max_bytes=4)
+        cache.put("a", b"aaaaa", [])
+
+        self.assertEqual((len(cache), cache.size), (0, 0))
+
+class TestOnDemandServer(unittest.TestCase):
+
+    def test_renders_pages_and_serves_static_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            static = os.path.join(tmp, "static")
+            write(os.path.join(content, "blog", "index.md"), "# Blog")
+            write(os.path.join(static, "index.css"), "body {}")
+            rendered = []
+
+            def render(from_path):
+                rendered.append(from_path)
+                with open(from_path) as md:
+                    return f"<html>{md.read()}</html>", [from_path]
+
+            server = make_on_demand_server(content, static, 0, render, PageCache())
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            base = f"http://localhost:{server.server_address[1]}"
+            try:
+                for _ in range(2):
+                    with urlopen(f"{base}/blog/") as response:
+                        self.assertEqual(response.read(), b"<html># Blog</html>")
+                with urlopen(f"{base}/blog") as response:
+                    self.assertEqual(response.url, f"{base}/blog/")
+                with urlopen(f"{base}/index.css") as response:
+                    self.assertEqual(response.read(), b"body {}")
+                with self.assertRaises(HTTPError) as raised:
+                    urlopen(f"{base}/missing.html")
+                raised.exception.close()
+                self.assertEqual(raised.exception.code, 404)
+            finally:
+                server.shutdown()
+                server.server_close()
+
+            self.assertEqual(rendered, [os.path.join(content, "blog", "index.md")])
+
+if __name__ == '__main__':
+    unittest.main()
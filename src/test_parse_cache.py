@@ -0,0 +1,58 @@
+import os, tempfile, time, unittest
+
+from parse_cache import ParseCache, parser_version
+
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp.name, "parse")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_get_put(self):
+        cache = ParseCache(self.directory)
+
+        self.assertIsNone(cache.get("ab" * 32))
+        cache.put("ab" * 32, "<div><p>cached</p></div>")
+        self.assertEqual(cache.get("ab" * 32), "<div><p>cached</p></div>")
+
+    def test_get_entry_with_links(self):
+        cache = ParseCache(self.directory)
+        cache.put("ab" * 32, "<div></div>", [("link", "/majesty")])
+
+        self.assertEqual(cache.get_entry("ab" * 32), ("<div></div>", [("link", "/majesty")]))
+        self.assertIsNone(cache.get_entry("cd" * 32))
+
+    def test_entries_live_under_parser_version(self):
+        cache = ParseCache(self.directory)
+        cache.put("ab" * 32, "<div></div>")
+
+        self.assertEqual(os.listdir(self.directory), [parser_version()])
+
+    def test_evict_other_versions(self):
+        stale = os.path.join(self.directory, "0" * 16, "ab")
+        os.makedirs(stale)
+        with open(os.path.join(stale, "old.z"), "wb") as f:
+            f.write(b"old")
+
+        removed = ParseCache(self.directory).evict()
+
+        self.assertEqual(removed, 1)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_evict_least_recently_used(self):
+        cache = ParseCache(self.directory, max_bytes=0)
+        cache.put("aa" * 32, "<p>first</p>")
+        cache.put("bb" * 32, "<p>second</p>")
+        first_path = cache._entry_path("aa" * 32)
+        os.utime(first_path, ns=(time.time_ns(), time.time_ns() - 10 ** 9))
+        cache.max_bytes = os.path.getsize(cache._entry_path("bb" * 32))
+
+        self.assertEqual(cache.evict(), 1)
+        self.assertIsNone(cache.get("aa" * 32))
+        self.assertEqual(cache.get("bb" * 32), "<p>second</p>")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os, tempfile, unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline import run_pipeline
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_items(self, items, render):
+        def write(item, rendered):
+            with open(item[1], "w") as f:
+                f.write(rendered)
+            return len(rendered)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            return run_pipeline(items, read=lambda item: item[0], render=render, write=write,
+                                destination=lambda item: item[1], render_executor=executor,
+                                render_workers=2, io_threads=4, queue_size=2)
+
+    def test_results_in_order(self):
+        items = [(f"page {index}", os.path.join(self.tmp.name, f"d{index % 3}", f"{index}.html")) for index in range(20)]
+
+        outcomes = self.run_items(items, lambda item, data: data.upper())
+
+        self.assertEqual(outcomes, [(len(f"PAGE {index}"), None) for index in range(20)])
+        with open(items[7][1]) as f:
+            self.assertEqual(f.read(), "PAGE 7")
+
+    def test_failures_are_reported_per_item(self):
+        items = [("good", os.path.join(self.tmp.name, "good.html")), ("bad", os.path.join(self.tmp.name, "bad.html"))]
+
+        def render(item, data):
+            if data == "bad":
+                raise ValueError("cannot render")
+            return data
+
+        outcomes = self.run_items(items, render)
+
+        self.assertEqual(outcomes[0], (4, None))
+        self.assertIsNone(outcomes[1][0])
+        self.assertIsInstance(outcomes[1][1], ValueError)
+        self.assertFalse(os.path.exists(items[1][1]))
+
+    def test_empty(self):
+        self.assertEqual(self.run_items([], lambda item, data: data), [])
+
+if __name__ == '__main__':
+    unittest.main()
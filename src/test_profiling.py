@@ -0,0 +1,73 @@
+import json, os, tempfile, tracemalloc, unittest
+
+from profiling import BuildProfiler, PageProfile, count_nodes
+from htmlnode import LeafNode, ParentNode
+
+class TestProfiling(unittest.TestCase):
+
+    def make_profile(self, page, stages):
+        profile = PageProfile(page)
+        for name in stages:
+            with profile.stage(name):
+                pass
+        return profile.to_dict()
+
+    def test_count_nodes(self):
+        node = ParentNode(tag="div", children=[
+                    ParentNode(tag="p", children=[LeafNode(tag="b", value="Bold text"), LeafNode(tag="text", value="text")]),
+                    ])
+
+        self.assertEqual(count_nodes(node), 4)
+
+    def test_page_profile_stages(self):
+        page = self.make_profile("index.md", ["read", "parse"])
+
+        self.assertEqual(page["page"], "index.md")
+        self.assertEqual([stage["name"] for stage in page["stages"]], ["read", "parse"])
+        self.assertTrue(all(stage["wall"] >= 0 for stage in page["stages"]))
+
+    def test_page_profile_memory(self):
+        tracing = tracemalloc.is_tracing()
+        try:
+            profile = PageProfile("big.md", memory_sites=3)
+            with profile.stage("parse"):
+                blocks = [bytearray(1024) for _ in range(1024)]
+            page = profile.to_dict()
+            del blocks
+        finally:
+            if not tracing:
+                tracemalloc.stop()
+
+        self.assertGreaterEqual(page["memory"]["peak"], 1024 * 1024)
+        self.assertEqual(len(page["memory"]["sites"]), 3)
+        site, size, count = page["memory"]["sites"][0]
+        self.assertTrue(site.startswith(__file__))
+        self.assertGreaterEqual(size, 1024 * 1024)
+
+        profiler = BuildProfiler()
+        profiler.add(page)
+        profiler.add(self.make_profile("small.md", ["read"]))
+        summary = profiler.memory_summary()
+        self.assertIn("Largest 1 page(s) by traced peak:", summary)
+        self.assertIn(site, summary)
+
+    def test_build_profiler_reports(self):
+        profiler = BuildProfiler()
+        profiler.add(self.make_profile("a.md", ["read", "parse"]))
+        profiler.add(self.make_profile("b.md", ["read"]))
+        profiler.add(None)
+
+        self.assertEqual(sorted(profiler.stage_totals()), ["parse", "read"])
+        self.assertEqual(len(profiler.slowest_pages(1)), 1)
+        self.assertIn("Slowest 1 page(s):", profiler.summary(limit=1))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            profiler.write_trace(os.path.join(tmp, "trace.json"))
+            with open(os.path.join(tmp, "trace.json")) as f:
+                events = json.load(f)["traceEvents"]
+
+        self.assertEqual(len(events), 3)
+        self.assertEqual(events[0]["ph"], "X")
+
+if __name__ == '__main__':
+    unittest.main()
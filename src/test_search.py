@@ -0,0 +1,65 @@
+import json, os, tempfile, unittest
+
+from mod_markdown import BlockCache, markdown_to_html_node
+from search import SearchStore, page_entry, tokenize, write_search_index
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Gandalf's **staff**, a 2nd-age relic!"), ["gandalf", "staff", "2nd", "age", "relic"])
+
+    def test_collect_texts(self):
+        markdown = "# The *Hobbit*\n\nThere and [back again](/back)\n\n```\ncode is skipped\n```"
+        expected = [("The ", 1), ("Hobbit", 1), ("There and ", 0), ("back again", 0)]
+
+        for block_cache in (None, BlockCache()):
+            texts = []
+            markdown_to_html_node(markdown, block_cache, texts=texts)
+            self.assertEqual(texts, expected)
+
+    def test_page_entry(self):
+        entry = page_entry([("The ", 1), ("Hobbit", 1), ("The hobbit returns", 0)])
+
+        self.assertEqual(entry["title"], "The Hobbit")
+        self.assertEqual(entry["postings"]["hobbit"], [6, [1, 3]])
+        self.assertEqual(entry["postings"]["returns"], [1, [4]])
+
+    def test_write_sharded(self):
+        directory = os.path.join(self.tmp.name, "search")
+        pages = [
+            ("/index.html", {"title": "Home", "postings": {"hobbit": [1, [0]], "home": [5, [1]]}}),
+            ("/blog/index.html", {"title": "Blog", "postings": {"hobbit": [2, [3, 9]]}}),
+        ]
+
+        self.assertEqual(write_search_index(pages, directory), (2, 0))
+        with open(os.path.join(directory, "index.json")) as f:
+            index = json.load(f)
+        with open(os.path.join(directory, "ho.json")) as f:
+            shard = json.load(f)
+
+        self.assertEqual(index["pages"], [["/index.html", "Home"], ["/blog/index.html", "Blog"]])
+        self.assertEqual(index["shards"], ["ho"])
+        self.assertEqual(shard, {"hobbit": [[0, 1, [0]], [1, 2, [3, 9]]], "home": [[0, 5, [1]]]})
+
+        self.assertEqual(write_search_index(pages, directory), (0, 0))
+        self.assertEqual(write_search_index([], directory), (1, 1))
+        self.assertEqual(sorted(os.listdir(directory)), ["index.json"])
+
+    def test_store_prune(self):
+        store = SearchStore(os.path.join(self.tmp.name, "store"))
+        store.put("aa" * 32, {"title": "Kept", "postings": {}})
+        store.put("bb" * 32, {"title": "Dropped", "postings": {}})
+
+        self.assertEqual(store.prune(["aa" * 32]), 1)
+        self.assertEqual(store.get("aa" * 32), {"title": "Kept", "postings": {}})
+        self.assertFalse(store.has("bb" * 32))
+        self.assertIsNone(store.get("bb" * 32))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import argparse, os, tempfile, unittest
+
+from shards import ShardCollisionError, merge_shards, parse_shard, select_shard, shard_of
+
+class TestShards(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.shards = [os.path.join(self.tmp.name, f"{index}-of-2") for index in (1, 2)]
+        self.dest = os.path.join(self.tmp.name, "public")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for text in ("0/4", "5/4", "2", "a/b"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_shard(text)
+
+    def test_shards_partition_pages(self):
+        pages = [(os.path.join("content", f"post{index}.md"), f"public/post{index}.html") for index in range(50)]
+
+        selected = [select_shard(pages, "content", index, 3) for index in (1, 2, 3)]
+
+        self.assertEqual(sorted(page for shard in selected for page in shard), sorted(pages))
+        self.assertTrue(all(selected))
+        self.assertEqual(shard_of(os.path.join("blog", "post.md"), 3), shard_of("blog/post.md", 3))
+
+    def test_merge(self):
+        self.write(os.path.join(self.shards[0], "index.html"), "<p>home</p>")
+        self.write(os.path.join(self.shards[1], "blog", "index.html"), "<p>blog</p>")
+        for shard in self.shards:
+            self.write(os.path.join(shard, "index.css"), "body {}")
+        self.write(os.path.join(self.dest, "stale.html"), "<p>old</p>")
+
+        copied, removed = merge_shards(self.shards, self.dest)
+
+        self.assertEqual(copied, [os.path.join("blog", "index.html"), "index.css", "index.html"])
+        self.assertEqual(removed, ["stale.html"])
+        self.assertEqual(merge_shards(self.shards, self.dest), ([], []))
+
+    def test_merge_collision(self):
+        self.write(os.path.join(self.shards[0], "index.html"), "<p>home</p>")
+        self.write(os.path.join(self.shards[1], "index.html"), "<p>other home</p>")
+
+        with self.assertRaises(ShardCollisionError) as context:
+            merge_shards(self.shards, self.dest)
+
+        self.assertEqual(context.exception.collisions, [("index.html", self.shards[0], self.shards[1])])
+        self.assertFalse(os.path.exists(self.dest))
+
+    def test_merge_missing_shard(self):
+        self.write(os.path.join(self.shards[0], "index.html"), "<p>home</p>")
+
+        with self.assertRaises(FileNotFoundError):
+            merge_shards(self.shards, self.dest)
+
+if __name__ == '__main__':
+    unittest.main()
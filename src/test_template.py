@@ -0,0 +1,92 @@
+import io, os, tempfile, time, unittest
+
+from template import Template, load_template, select_template
+from htmlnode import LeafNode, ParentNode
+
+class TestTemplate(unittest.TestCase):
+
+    def test_compile(self):
+        template = Template("<title>{{ Title }}</title><main>{{Content}}</main>")
+
+        self.assertEqual(template.segments, ["<title>", "</title><main>", "</main>"])
+        self.assertEqual([name for name, _ in template.slots], ["Title", "Content"])
+
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}{{ Footer }}")
+        content = ParentNode(tag="p", children=[LeafNode(tag="b", value="Bold text")])
+
+        stream = io.StringIO()
+        template.render(stream, {"Title": "Home", "Content": content})
+
+        self.assertEqual(stream.getvalue(), "<title>Home</title><p><b>Bold text</b></p>{{ Footer }}")
+
+    def test_render_no_slots(self):
+        stream = io.StringIO()
+        Template("<p>static</p>").render(stream, {"Title": "Home"})
+
+        self.assertEqual(stream.getvalue(), "<p>static</p>")
+
+    def test_load_template_cached(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write("{{ Title }}")
+
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+
+            with open(path, "w") as f:
+                f.write("<h1>{{ Title }}</h1>")
+            os.utime(path, ns=(time.time_ns(), first.mtime_ns + 1))
+
+            second = load_template(path)
+            self.assertIsNot(second, first)
+            self.assertEqual(second.segments, ["<h1>", "</h1>"])
+
+    def test_render_minify(self):
+        template = Template("<html>\n  <title>{{ Title }}</title>\n  <div>{{ Content }}</div>\n</html>\n", minify=True)
+        content = ParentNode(tag="p", children=[LeafNode(tag="a", value="post", props={"href": "/post"})])
+
+        stream = io.StringIO()
+        template.render(stream, {"Title": "Home", "Content": content})
+
+        self.assertEqual(stream.getvalue(), '<html><title>Home</title><div><p><a href=/post>post</a></p></div></html>')
+
+    def test_asset_urls(self):
+        source = '<link href="/index.css" rel="stylesheet"><script src=/app.js></script><a href="/about">{{ Content }}</a>'
+        asset_urls = {"/index.css": "/index.1a2b3c4d.css", "/app.js": "/app.5e6f7a8b.js", "/unused.png": "/x.png"}
+
+        template = Template(source, asset_urls=asset_urls)
+
+        self.assertEqual(template.segments[0],
+                         '<link href="/index.1a2b3c4d.css" rel="stylesheet"><script src=/app.5e6f7a8b.js></script>'
+                         '<a href="/about">')
+        self.assertEqual(template.assets, {"/index.css": "/index.1a2b3c4d.css", "/app.js": "/app.5e6f7a8b.js"})
+
+    def test_load_template_recompiles_for_renamed_assets(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write('<link href="/index.css">{{ Content }}')
+
+            first = load_template(path, asset_urls={"/index.css": "/index.aaaaaaaa.css", "/a.png": "/a.1.png"})
+            self.assertIs(load_template(path, asset_urls={"/index.css": "/index.aaaaaaaa.css"}), first)
+
+            second = load_template(path, asset_urls={"/index.css": "/index.bbbbbbbb.css"})
+            self.assertEqual(second.segments[0], '<link href="/index.bbbbbbbb.css">')
+            self.assertEqual(load_template(path).segments[0], '<link href="/index.css">')
+
+    def test_select_template(self):
+        layouts = {
+            "content/blog": "blog.html",
+            "content/blog/special.md": "special.html",
+        }
+
+        self.assertEqual(select_template("./content/index.md", "template.html", layouts), "template.html")
+        self.assertEqual(select_template("./content/blog/post.md", "template.html", layouts), "blog.html")
+        self.assertEqual(select_template("./content/blog/special.md", "template.html", layouts), "special.html")
+        self.assertEqual(select_template("./content/blogroll.md", "template.html", layouts), "template.html")
+        self.assertEqual(select_template("./content/index.md", "template.html"), "template.html")
+
+if __name__ == '__main__':
+    unittest.main()
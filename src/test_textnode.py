@@ -23,5 +23,10 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("This is a text node", TextType.IMAGE, "https://image.com")
         self.assertEqual(node, node2) # should return True   
 
+    def test_slots(self):
+        node = TextNode("This is a text node", TextType.TEXT)
+        with self.assertRaises(AttributeError):
+            node.extra = "not allowed" # type: ignore
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,136 @@
+import os, queue, tempfile, threading, time, unittest
+
+from watch import LiveReload, WatchedTree, _watch_polling, snapshot, watch
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+def touch_dir(path):
+    # Bump the mtime explicitly; filesystem timestamps can be too coarse to tell two quick edits apart.
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+
+class Stop(Exception):
+    pass
+
+class TestSnapshot(unittest.TestCase):
+
+    def test_snapshot_files_and_dirs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            os.makedirs(os.path.join(content, "blog"))
+            template = os.path.join(tmp, "template.html")
+            for path in (os.path.join(content, "blog", "post.md"), template):
+                with open(path, "w") as f:
+                    f.write("# Title")
+
+            files = snapshot([content, template, os.path.join(tmp, "missing")])
+
+            self.assertEqual(sorted(files), [os.path.join(content, "blog", "post.md"), template])
+            self.assertEqual(files[template][1], len("# Title"))
+
+class TestWatchedTree(unittest.TestCase):
+
+    def test_poll_rescans_changed_directories(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            write(os.path.join(content, "index.md"), "# Home")
+            write(os.path.join(content, "blog", "post.md"), "# Post")
+            tree = WatchedTree([content])
+
+            write(os.path.join(content, "blog", "new.md"), "# New")
+            touch_dir(os.path.join(content, "blog"))
+            changed, removed = set(), set()
+            tree.poll(changed, removed)
+
+            self.assertEqual(changed, {os.path.join(content, "blog", "new.md")})
+            self.assertEqual(removed, set())
+
+            os.remove(os.path.join(content, "blog", "post.md"))
+            os.remove(os.path.join(content, "blog", "new.md"))
+            os.rmdir(os.path.join(content, "blog"))
+            touch_dir(content)
+            changed, removed = set(), set()
+            tree.poll(changed, removed)
+
+            self.assertEqual(removed, {os.path.join(content, "blog", "post.md"), os.path.join(content, "blog", "new.md")})
+            self.assertEqual(sorted(tree.files), [os.path.join(content, "index.md")])
+
+    def test_full_poll_finds_edits_in_place(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            page = os.path.join(tmp, "index.md")
+            write(page, "# Home")
+            tree = WatchedTree([tmp])
+
+            with open(page, "a") as f:
+                f.write("\nmore")
+            changed, removed = set(), set()
+            tree.poll(changed, removed, full=True)
+
+            self.assertEqual(changed, {page})
+
+class TestWatch(unittest.TestCase):
+
+    def run_watcher(self, target, tmp):
+        changes = queue.Queue()
+
+        def on_change(changed, removed, files):
+            changes.put((changed, removed))
+            raise Stop()
+
+        def run():
+            try:
+                target(on_change)
+            except Stop:
+                pass
+
+        page = os.path.join(tmp, "content", "index.md")
+        write(page, "# Home")
+        template = os.path.join(tmp, "template.html")
+        write(template, "{{ Content }}")
+        self.roots = [os.path.join(tmp, "content"), template]
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        time.sleep(0.2)
+
+        with open(page, "a") as f:
+            f.write("\nmore")
+        changed, removed = changes.get(timeout=5)
+        thread.join(timeout=5)
+        return page, changed, removed
+
+    def test_watch_reports_edits(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            page, changed, removed = self.run_watcher(lambda on_change: watch(self.roots, on_change), tmp)
+
+        self.assertEqual((changed, removed), ({page}, set()))
+
+    def test_polling_reports_edits(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            page, changed, removed = self.run_watcher(
+                lambda on_change: _watch_polling(WatchedTree(self.roots), on_change, 0.01, sweep_interval=0.05), tmp)
+
+        self.assertEqual((changed, removed), ({page}, set()))
+
+class TestLiveReload(unittest.TestCase):
+
+    def test_wait_timeout(self):
+        live_reload = LiveReload()
+
+        self.assertEqual(live_reload.wait(0, timeout=0.01), 0)
+
+    def test_notify_wakes_waiters(self):
+        live_reload = LiveReload()
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(live_reload.wait(0, timeout=5)))
+        waiter.start()
+
+        live_reload.notify()
+        waiter.join()
+
+        self.assertEqual(results, [1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,334 @@
+import ctypes, ctypes.util, errno, os, select, struct, sys, threading, time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from discovery import is_ignored
+
+LIVE_RELOAD_PATH = "/__livereload"
+LIVE_RELOAD_SCRIPT = (
+    f'<script>new EventSource("{LIVE_RELOAD_PATH}").onmessage = () => location.reload();</script>'
+)
+
+
+class LiveReload:
+    """Build generation counter that open browser tabs wait on."""
+
+    def __init__(self):
+        self.generation = 0
+        self._condition = threading.Condition()
+
+    def notify(self):
+        with self._condition:
+            self.generation += 1
+            self._condition.notify_all()
+
+    def wait(self, generation, timeout=None) -> int:
+        with self._condition:
+            self._condition.wait_for(lambda: self.generation != generation, timeout)
+            return self.generation
+
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    """Serves the output directory, injecting the reload script into HTML pages."""
+
+    def __init__(self, *args, live_reload=None, **kwargs):
+        self.live_reload = live_reload
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        url_path = self.path.split("?", 1)[0]
+        if url_path == LIVE_RELOAD_PATH:
+            return self.stream_reloads()
+
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and url_path.endswith("/"):
+            path = os.path.join(path, "index.html")
+
+        if not path.endswith(".html") or not os.path.isfile(path):
+            return super().do_GET()
+
+        with open(path, "rb") as f:
+            body = f.read()
+        marker = body.rfind(b"</body>")
+        script = LIVE_RELOAD_SCRIPT.encode("utf-8")
+        body = body[:marker] + script + body[marker:] if marker != -1 else body + script
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_reloads(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        generation = self.live_reload.generation
+        try:
+            while True:
+                latest = self.live_reload.wait(generation, timeout=15)
+                # Comment lines keep idle connections from being dropped by proxies.
+                message = "data: reload\n\n" if latest != generation else ": ping\n\n"
+                self.wfile.write(message.encode("utf-8"))
+                self.wfile.flush()
+                generation = latest
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(directory, port, live_reload):
+    """Starts a threaded HTTP server for `directory` in the background and returns it."""
+    handler = partial(LiveReloadHandler, directory=directory, live_reload=live_reload)
+    server = ThreadingHTTPServer(("", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# inotify(7) event bits: content writes, metadata changes and every way an
+# entry can appear in or leave a directory.
+IN_MODIFY, IN_ATTRIB, IN_CLOSE_WRITE = 0x2, 0x4, 0x8
+IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, IN_DELETE = 0x40, 0x80, 0x100, 0x200
+IN_Q_OVERFLOW, IN_IGNORED = 0x4000, 0x8000
+INOTIFY_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+INOTIFY_EVENT = struct.Struct("iIII")
+# Editors write a file in several steps; events closer together than this are handled as one change.
+SETTLE_SECONDS = 0.02
+
+
+class WatchedTree:
+    """(mtime_ns, size) of every file under the watched roots, refreshed one directory at a time.
+
+    `files` maps file paths to their state and `dirs` maps each directory to
+    its mtime and the paths of its files and subdirectories, so a change only
+    costs a listing of the directories it touched. Roots that aren't
+    directories are watched as single files.
+    """
+
+    def __init__(self, roots):
+        self.files = {}
+        self.dirs = {}
+        self.file_roots = []
+        for root in roots:
+            if os.path.isdir(root):
+                self.scan(root, set(), set())
+            else:
+                self.file_roots.append(root)
+                self.stat_file(root, set(), set())
+
+    def stat_file(self, path, changed, removed):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            if self.files.pop(path, None) is not None:
+                removed.add(path)
+            return
+        state = (stat.st_mtime_ns, stat.st_size)
+        if self.files.get(path) != state:
+            self.files[path] = state
+            changed.add(path)
+
+    def scan(self, directory, changed, removed):
+        """Re-lists `directory`, adding new and modified files to `changed` and deleted ones to `removed`.
+
+        New subdirectories are scanned too; deleted ones are dropped with their files.
+        """
+        files, subdirs = {}, set()
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if is_ignored(entry.name):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.add(entry.path)
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        except (FileNotFoundError, NotADirectoryError):
+            self.drop(directory, removed)
+            return
+
+        _, old_files, old_subdirs = self.dirs.get(directory, (None, set(), set()))
+        for path in old_files - files.keys():
+            del self.files[path]
+            removed.add(path)
+        for path, state in files.items():
+            if self.files.get(path) != state:
+                self.files[path] = state
+                changed.add(path)
+        for path in old_subdirs - subdirs:
+            self.drop(path, removed)
+
+        self.dirs[directory] = (mtime_ns, set(files), subdirs)
+        for path in subdirs - old_subdirs:
+            self.scan(path, changed, removed)
+
+    def drop(self, directory, removed):
+        entry = self.dirs.pop(directory, None)
+        if entry is None:
+            return
+        for path in entry[1]:
+            del self.files[path]
+            removed.add(path)
+        for path in entry[2]:
+            self.drop(path, removed)
+
+    def poll(self, changed, removed, full=False):
+        """Rescans the directories whose mtime changed, or all of them when `full`."""
+        for directory, (mtime_ns, _, _) in list(self.dirs.items()):
+            if directory not in self.dirs:
+                continue
+            try:
+                current = os.stat(directory).st_mtime_ns
+            except FileNotFoundError:
+                current = None
+            if full or current != mtime_ns:
+                self.scan(directory, changed, removed)
+        for path in self.file_roots:
+            self.stat_file(path, changed, removed)
+
+
+class Inotify:
+    """Minimal ctypes binding to Linux inotify, for watching directories without polling."""
+
+    def __init__(self, libc):
+        self.libc = libc
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.paths = {}
+
+    @classmethod
+    def create(cls):
+        """Returns an Inotify, or None where inotify is unavailable."""
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            return cls(libc)
+        except (OSError, AttributeError):
+            return None
+
+    def add(self, path) -> bool:
+        """Watches directory `path`; False when the watch limit is reached."""
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), INOTIFY_MASK)
+        if wd < 0:
+            # A directory deleted before it could be watched is simply gone.
+            return ctypes.get_errno() in (errno.ENOENT, errno.ENOTDIR)
+        self.paths[wd] = path
+        return True
+
+    def read(self, timeout=None):
+        """Waits up to `timeout` seconds for events.
+
+        Returns:
+            tuple(set(str), bool): the watched directories with events, and
+            whether the kernel queue overflowed so events were lost.
+        """
+        directories, overflow = set(), False
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return directories, overflow
+
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                elif mask & IN_IGNORED:
+                    self.paths.pop(wd, None)
+                elif wd in self.paths:
+                    directories.add(self.paths[wd])
+        return directories, overflow
+
+    def close(self):
+        os.close(self.fd)
+
+
+def snapshot(roots) -> dict:
+    """Returns {path: (mtime_ns, size)} for every file under the given files or directories."""
+    return WatchedTree(roots).files
+
+
+def watch(roots, on_change, interval=0.1):
+    """Watches `roots` forever, calling on_change(changed, removed, files) after each edit.
+
+    `changed` holds new or modified paths, `removed` deleted ones, and `files`
+    the current {path: (mtime_ns, size)} of every watched file. On Linux,
+    inotify reports which directories changed and only those are listed again;
+    elsewhere, and when inotify runs out of watches, `roots` are polled (see
+    _watch_polling), which also works on network filesystems.
+    """
+    tree = WatchedTree(roots)
+    inotify = Inotify.create()
+    if inotify is not None:
+        try:
+            _watch_events(tree, inotify, on_change)
+        finally:
+            inotify.close()
+    _watch_polling(tree, on_change, interval)
+
+
+def _watch_events(tree, inotify, on_change):
+    # Returns only when a directory can't be watched, to fall back to polling.
+    # Single-file roots are stat'ed after every batch of events, so their directories only need to wake us.
+    for directory in {os.path.dirname(path) or "." for path in tree.file_roots}:
+        if not inotify.add(directory):
+            return
+
+    while True:
+        # Watches of deleted directories are gone (IN_IGNORED), so a recreated one is added again.
+        for directory in tree.dirs.keys() - set(inotify.paths.values()):
+            if not inotify.add(directory):
+                return
+
+        directories, overflow = inotify.read()
+        while True:
+            more, more_overflow = inotify.read(SETTLE_SECONDS)
+            if not more and not more_overflow:
+                break
+            directories |= more
+            overflow = overflow or more_overflow
+
+        changed, removed = set(), set()
+        if overflow:
+            tree.poll(changed, removed, full=True)
+        else:
+            for directory in sorted(directories):
+                if directory in tree.dirs:
+                    tree.scan(directory, changed, removed)
+            for path in tree.file_roots:
+                tree.stat_file(path, changed, removed)
+        if changed or removed:
+            on_change(changed, removed, tree.files)
+
+
+def _watch_polling(tree, on_change, interval, sweep_interval=1.0):
+    # Adding, removing or renaming a file (as most editors do when saving)
+    # changes its directory's mtime, so directories are checked every tick.
+    # A file rewritten in place doesn't, so all files are also swept, at most
+    # every `sweep_interval` and never for more than a fifth of the time.
+    last_sweep = time.monotonic()
+    sweep_seconds = 0.0
+    while True:
+        time.sleep(interval)
+        changed, removed = set(), set()
+        start = time.monotonic()
+        full = start - last_sweep >= max(sweep_interval, 4 * sweep_seconds)
+        tree.poll(changed, removed, full)
+        if full:
+            last_sweep = time.monotonic()
+            sweep_seconds = last_sweep - start
+        if changed or removed:
+            on_change(changed, removed, tree.files)